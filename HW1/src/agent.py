@@ -1,32 +1,54 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 from smolagents import CodeAgent, OpenAIServerModel
-from tools import NutritionLookup
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+
+from tools import NutritionLookup, NutritionBatchLookup
+from llm_cache import CachedModel
+from profiling import profile_from_env
 import dotenv
 
 # Load environment variables
 dotenv.load_dotenv()
 
+# Initialize model
+model_id = "gemini-2.5-flash"
+
+
+def build_model():
+    """Create the Gemini model used by the agent, cached if NUTRITION_LLM_CACHE is set."""
+    return CachedModel.from_env(OpenAIServerModel(
+        model_id=model_id,
+        api_base="https://generativelanguage.googleapis.com/v1beta/openai/",
+        api_key=os.getenv("GEMINI_API_KEY"),
+    ))
+
+
+def build_agent(model, tools=None, **kwargs):
+    """Create a CodeAgent over `tools` (defaults to fresh batch and single-item lookups)."""
+    if tools is None:
+        tools = [NutritionBatchLookup(), NutritionLookup()]
+    kwargs.setdefault("max_steps", 6)
+    return CodeAgent(
+        tools=tools,
+        model=model,
+        additional_authorized_imports=[],
+        **kwargs,
+    )
+
+
 # Initialize tools
+batch_tool = NutritionBatchLookup()
 nutrition_tool = NutritionLookup()
-tools = [nutrition_tool]
+tools = [batch_tool, nutrition_tool]
 
-# Initialize model
-model_id = "gemini-2.5-flash"
-model = OpenAIServerModel(
-    model_id=model_id,
-    api_base="https://generativelanguage.googleapis.com/v1beta/openai/",
-    api_key=os.getenv("GEMINI_API_KEY"),
-)
-
-# Initialize agent
-agent = CodeAgent(
-    tools=tools,
-    model=model,
-    additional_authorized_imports=[],
-    max_steps=6
-)
+model = build_model()
+
+# Initialize agent (profiled if NUTRITION_PROFILE_DIR is set)
+agent = profile_from_env(build_agent(model, tools))
 
 def main():
     # Ask for valid age
@@ -1,8 +1,37 @@
 #!/usr/bin/env python3
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from smolagents import Tool
 
+NUTRITIONIX_URL = os.getenv("NUTRITIONIX_URL", "https://trackapi.nutritionix.com/v2/natural/nutrients")
+NUTRITIONIX_TIMEOUT = float(os.getenv("NUTRITIONIX_TIMEOUT", "30"))  # seconds to wait for a response
+BATCH_MAX_WORKERS = 8
+
+
+def fetch_nutrients(app_id: str, app_key: str, query: str) -> list[dict]:
+    """
+    Calls the Nutritionix Natural Language Nutrients API.
+
+    Returns the list of matched foods. Raises RuntimeError on any API error,
+    including Nutritionix's 404 for queries it cannot match, and
+    requests.Timeout if Nutritionix takes longer than NUTRITIONIX_TIMEOUT.
+    """
+    headers = {
+        "x-app-id": app_id,
+        "x-app-key": app_key,
+        "Content-Type": "application/json",
+    }
+    payload = {"query": query}
+
+    response = requests.post(NUTRITIONIX_URL, headers=headers, json=payload, timeout=NUTRITIONIX_TIMEOUT)
+
+    if response.status_code != 200:
+        raise RuntimeError(f"Nutritionix API error: {response.status_code} - {response.text}")
+
+    return response.json().get("foods", [])
+
+
 class NutritionLookup(Tool):
     """
     A tool that uses the Nutritionix API to fetch detailed nutrition information about food items.
@@ -43,23 +72,8 @@ class NutritionLookup(Tool):
         if not food.strip():
             raise ValueError("`food` cannot be an empty string.")
 
-        url = "https://trackapi.nutritionix.com/v2/natural/nutrients"
-        headers = {
-            "x-app-id": self.app_id,
-            "x-app-key": self.app_key,
-            "Content-Type": "application/json",
-        }
-        payload = {"query": food}
-
-        response = requests.post(url, headers=headers, json=payload)
-
-        if response.status_code != 200:
-            raise RuntimeError(f"Nutritionix API error: {response.status_code} - {response.text}")
+        foods = fetch_nutrients(self.app_id, self.app_key, food)
 
-        data = response.json()
-
-        # Extract the first food item from the response
-        foods = data.get("foods", [])
         if not foods:
             return f"No nutrition data found for {food}."
 
@@ -78,4 +92,92 @@ class NutritionLookup(Tool):
             )
 
         return "\n".join(results)
-    
\ No newline at end of file
+    
+
+class NutritionBatchLookup(Tool):
+    """
+    A tool that looks up many food items in one call, concurrently.
+    """
+
+    name: str = "nutrition_batch_lookup"
+    description: str = (
+        "Get nutrition facts for a list of food items in one call. "
+        "Returns a per-item table (calories, protein, carbs, fat) and the summed totals. "
+        "Prefer this over nutrition_lookup whenever there is more than one item."
+    )
+    inputs: dict = {
+        "foods": {
+            "type": "array",
+            "items": {"type": "string", "description": "Food item with quantity (e.g., '2 slices of pizza')."},
+            "description": "List of food items.",
+        }
+    }
+    output_type: str = "string"
+
+    def __init__(self):
+        super().__init__()
+        self.app_id = os.getenv("NUTRITIONIX_APP_ID")
+        self.app_key = os.getenv("NUTRITIONIX_API_KEY")
+        if not self.app_id or not self.app_key:
+            raise ValueError("Missing NUTRITIONIX_APP_ID or NUTRITIONIX_API_KEY in environment variables.")
+
+    def _lookup(self, query: str):
+        try:
+            return fetch_nutrients(self.app_id, self.app_key, query), None
+        except (RuntimeError, requests.RequestException) as e:
+            return [], str(e)
+
+    def forward(self, foods: list[str]) -> str:
+        """
+        Looks up each distinct item once, in parallel, and tabulates the results.
+
+        Args:
+            foods: The food items eaten, one description per entry.
+
+        Returns:
+            A markdown table with one row per matched food plus a totals row.
+            Items Nutritionix could not match are listed below the table.
+        """
+        if not isinstance(foods, list) or not foods:
+            raise ValueError("`foods` must be a non-empty list of strings.")
+        if not all(isinstance(f, str) and f.strip() for f in foods):
+            raise ValueError("`foods` cannot contain empty strings.")
+
+        # Identical items (ignoring case and spacing) are fetched once.
+        keys = [" ".join(f.lower().split()) for f in foods]
+        unique = list(dict.fromkeys(keys))
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(unique))) as pool:
+            resolved = dict(zip(unique, pool.map(self._lookup, unique)))
+
+        rows = ["| Item | Food | Serving | Calories (kcal) | Protein (g) | Carbs (g) | Fat (g) |",
+                "|---|---|---|---|---|---|---|"]
+        totals = {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0}
+        unmatched = []
+        for food, key in zip(foods, keys):
+            items, error = resolved[key]
+            if not items:
+                unmatched.append(f"{food} ({error})" if error else food)
+                continue
+            for item in items:
+                values = {
+                    "calories": item.get("nf_calories") or 0,
+                    "protein": item.get("nf_protein") or 0,
+                    "carbs": item.get("nf_total_carbohydrate") or 0,
+                    "fat": item.get("nf_total_fat") or 0,
+                }
+                for k, v in values.items():
+                    totals[k] += v
+                serving = f"{item.get('serving_qty', '')} {item.get('serving_unit', '')}".strip()
+                rows.append(
+                    f"| {food} | {item.get('food_name', 'Unknown').title()} | {serving} | {values['calories']} | "
+                    f"{values['protein']} | {values['carbs']} | {values['fat']} |"
+                )
+
+        rows.append(
+            f"| **Total** | | | {totals['calories']:.1f} | {totals['protein']:.1f} | "
+            f"{totals['carbs']:.1f} | {totals['fat']:.1f} |"
+        )
+        if unmatched:
+            rows.append("")
+            rows.append("No nutrition data found for: " + "; ".join(unmatched))
+        return "\n".join(rows)
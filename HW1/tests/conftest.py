@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# tests/conftest.py
+# Fixtures shared by the offline tests.
+import pytest
+
+
+@pytest.fixture
+def nutritionix_credentials(monkeypatch):
+    """Dummy Nutritionix credentials, so the lookup tools can be built without real keys."""
+    monkeypatch.setenv("NUTRITIONIX_APP_ID", "test")
+    monkeypatch.setenv("NUTRITIONIX_API_KEY", "test")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/test_profiling.py
+import importlib
+import json
+import pstats
+from unittest.mock import patch, MagicMock
+
+import tools
+from fakes import ScriptedModel, code_step
+
+BANANA = {"food_name": "banana", "serving_qty": 1, "serving_unit": "medium",
+          "nf_calories": 105, "nf_protein": 1.3, "nf_total_carbohydrate": 27, "nf_total_fat": 0.4}
+
+
+def load_agent_module(monkeypatch, profile_dir=None):
+    """Import agent.py afresh, as `make agent1` would, with or without NUTRITION_PROFILE_DIR."""
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setenv("NUTRITIONIX_APP_ID", "test")
+    monkeypatch.setenv("NUTRITIONIX_API_KEY", "test")
+    if profile_dir:
+        monkeypatch.setenv("NUTRITION_PROFILE_DIR", str(profile_dir))
+    else:
+        monkeypatch.delenv("NUTRITION_PROFILE_DIR", raising=False)
+    monkeypatch.delitem(sys.modules, "agent", raising=False)
+    return importlib.import_module("agent")
+
+
+# ------------------------------------------
+# 1. agent.py wiring
+# ------------------------------------------
+def test_agent_is_not_profiled_by_default(monkeypatch):
+    agent_module = load_agent_module(monkeypatch)
+
+    assert "run" not in agent_module.agent.__dict__
+
+
+@patch("tools.requests.post")
+def test_profiled_agent_run_writes_tool_profile(mock_post, tmp_path, monkeypatch):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"foods": [BANANA]}
+    mock_post.return_value = response
+    agent_module = load_agent_module(monkeypatch, tmp_path / "profiles")
+    agent_module.agent.model = ScriptedModel(steps=[code_step("final_answer(nutrition_lookup(food='1 banana'))")])
+
+    answer = agent_module.agent.run("What is in a banana?")
+
+    (run_id,) = os.listdir(tmp_path / "profiles")
+    run_dir = tmp_path / "profiles" / run_id
+    with open(run_dir / "summary.json") as f:
+        summary = json.load(f)
+    profiled = pstats.Stats(str(run_dir / "profile.prof")).stats
+    assert "Banana" in answer
+    assert summary["tools"]["nutrition_lookup"]["calls"] == 1
+    assert "forward" in {name for filename, _, name in profiled if filename == tools.__file__}
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# tests/test_tools.py
+import pytest
+from unittest.mock import patch, MagicMock
+
+from tools import NutritionLookup, NutritionBatchLookup, NUTRITIONIX_TIMEOUT
+
+
+def nutritionix_response(query_to_foods):
+    """Build a fake requests.post that answers per query."""
+    def post(url, headers=None, json=None, timeout=None):
+        response = MagicMock()
+        foods = query_to_foods.get(json["query"])
+        if foods is None:
+            response.status_code = 404
+            response.text = "We couldn't match any of your foods"
+        else:
+            response.status_code = 200
+            response.json.return_value = {"foods": foods}
+        return response
+    return post
+
+
+BANANA = {"food_name": "banana", "serving_qty": 1, "serving_unit": "medium",
+          "nf_calories": 105, "nf_protein": 1.3, "nf_total_carbohydrate": 27, "nf_total_fat": 0.4}
+PIZZA = {"food_name": "pizza", "serving_qty": 2, "serving_unit": "slice",
+         "nf_calories": 570, "nf_protein": 24.4, "nf_total_carbohydrate": 71.3, "nf_total_fat": 20.7}
+
+
+# ------------------------------------------
+# 1. NutritionLookup
+# ------------------------------------------
+@patch("tools.requests.post")
+def test_nutrition_lookup_success(mock_post, nutritionix_credentials):
+    mock_post.side_effect = nutritionix_response({"1 banana": [BANANA]})
+
+    result = NutritionLookup().forward("1 banana")
+
+    assert result == "Banana (1 medium): 105 kcal, Protein: 1.3 g, Carbs: 27 g, Fat: 0.4 g"
+    assert mock_post.call_args.kwargs["timeout"] == NUTRITIONIX_TIMEOUT
+
+
+# ------------------------------------------
+# 2. NutritionBatchLookup
+# ------------------------------------------
+@patch("tools.requests.post")
+def test_batch_lookup_dedups_and_sums(mock_post, nutritionix_credentials):
+    mock_post.side_effect = nutritionix_response({"1 banana": [BANANA], "2 slices of pizza": [PIZZA]})
+
+    table = NutritionBatchLookup().forward(["1 banana", "2 slices of pizza", "1  Banana"])
+
+    # "1 banana" and "1  Banana" share one request but both count toward totals.
+    assert mock_post.call_count == 2
+    assert table.count("| Banana |") == 2
+    assert "| **Total** | | | 780.0 | 27.0 | 125.3 | 21.5 |" in table
+
+
+@patch("tools.requests.post")
+def test_batch_lookup_reports_unmatched_items(mock_post, nutritionix_credentials):
+    mock_post.side_effect = nutritionix_response({"1 banana": [BANANA]})
+
+    table = NutritionBatchLookup().forward(["1 banana", "dragonfire elixir"])
+
+    assert "| **Total** | | | 105.0 | 1.3 | 27.0 | 0.4 |" in table
+    assert "No nutrition data found for: dragonfire elixir (Nutritionix API error: 404" in table
+
+
+def test_batch_lookup_rejects_empty_items(nutritionix_credentials):
+    with pytest.raises(ValueError):
+        NutritionBatchLookup().forward(["banana", " "])
@@ -1,44 +1,68 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 from datetime import date
 import dotenv
 from smolagents import CodeAgent, OpenAIServerModel
 
-from tools import NutritionLookup, UserTracker, DeficitCalculator, UserTrends, ReportGenerator
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+
+from tools import NutritionLookup, UserTracker, DeficitCalculator, UserTrends, ReportGenerator, NUTRITION_CACHE
+from budget import BudgetedAgent, RunBudget
+from llm_cache import CachedModel
+from streaming import stream_agent_run
+from warming import warm_in_background
+from profiling import profile_from_env
 
 # Load environment variables
 dotenv.load_dotenv()
 
 # Initialize model
 model_id = "gemini-2.5-flash"
-model = OpenAIServerModel(
-    model_id=model_id,
-    api_base="https://generativelanguage.googleapis.com/v1beta/openai/",
-    api_key=os.getenv("GEMINI_API_KEY"),
-)
+
+
+def build_model():
+    """Create the Gemini model used by the agent and the trends tool, cached if NUTRITION_LLM_CACHE is set."""
+    return CachedModel.from_env(OpenAIServerModel(
+        model_id=model_id,
+        api_base="https://generativelanguage.googleapis.com/v1beta/openai/",
+        api_key=os.getenv("GEMINI_API_KEY"),
+    ))
+
+
+def build_tools(model):
+    """Create a fresh set of nutrition tools bound to `model`."""
+    return [
+        NutritionLookup(),
+        UserTracker(),
+        DeficitCalculator(),
+        UserTrends(model=model),
+        ReportGenerator(),
+    ]
+
+
+def build_agent(model, tools=None, **kwargs):
+    """Create a CodeAgent over `tools` (defaults to `build_tools(model)`)."""
+    if tools is None:
+        tools = build_tools(model)
+    kwargs.setdefault("max_steps", 15)
+    return CodeAgent(
+        tools=tools,
+        model=model,
+        additional_authorized_imports=["json"],
+        **kwargs,
+    )
+
+
+model = build_model()
 
 # Initialize tools
-nutrition_tool = NutritionLookup()
-user_tracker = UserTracker()
-deficit_tool = DeficitCalculator()
-trends_tool = UserTrends(model=model)
-report_tool = ReportGenerator()
-tools = [
-    nutrition_tool,
-    user_tracker,
-    deficit_tool,
-    trends_tool,
-    report_tool,
-]
-
-# Initialize agent
-agent = CodeAgent(
-    tools=tools,
-    model=model,
-    additional_authorized_imports=["json"],
-    max_steps=15
-)
+tools = build_tools(model)
+nutrition_tool, user_tracker, deficit_tool, trends_tool, report_tool = tools
+
+# Initialize agent (profiled if NUTRITION_PROFILE_DIR is set)
+agent = profile_from_env(build_agent(model, tools))
 
 
 def main():
@@ -61,6 +85,9 @@ def main():
         if not os.path.isfile(user_file_path):
             print(f"⚠️ No data found for user '{name}'. Please set up your profile as a new user.")
             current_user = "n"
+        elif NUTRITION_CACHE.enabled:
+            # Fetch this user's usual foods while they type today's log
+            warm_in_background(name, lookup=nutrition_tool)
     if current_user == "n":
         age = int(input("Enter your age: ").strip())
         weight = float(input("Enter your weight (kg): ").strip())
@@ -88,6 +115,7 @@ def main():
         print("⚠️ No food items entered. Exiting.")
         return
 
+    user_info = None
     if current_user == "y":
         query = (
             f"User: {name}. "
@@ -104,9 +132,27 @@ def main():
             "Create the user and estimate calories, check for macro/micro deficits or surpluses, "
             "and provide suggestions."
         )
+        user_info = [name, age, weight, height, gender]
+
+    # Run the agent, under per-run budgets if any are configured
+    budget = RunBudget.from_env()
+    if budget.is_unlimited():
+        run, run_kwargs = agent.run, {}
+    else:
+        run, run_kwargs = BudgetedAgent(agent, budget).run, {"user_info": user_info}
+
+    # Print report sections as the tools produce them instead of waiting for the whole answer
+    if os.getenv("NUTRITION_STREAM", "").strip().lower() in ["1", "true", "yes"]:
+        print()
+        stream = stream_agent_run(agent, query, run=run, **run_kwargs)
+        for fragment in stream:
+            print(fragment, end="", flush=True)
+        # The sections above were streamed as they were computed; the agent's answer repeats them in full.
+        print("\n📊 Full Nutrition Report:\n")
+        print(stream.answer)
+        return
 
-    # Run the agent
-    answer = agent.run(query)
+    answer = run(query, **run_kwargs)
 
     print("\n📊 Nutrition Agent Output:\n")
     print(answer)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Per-run budgets for the CodeAgent: LLM tokens, wall-clock time and tool calls.
+
+BudgetedAgent wraps an existing agent once: its model (and any tool that holds a
+model, such as UserTrends) is wrapped in a BudgetedModel and each tool's
+`forward` is counted. When a limit is hit the run is stopped at the next model
+or tool call and a partial ReportGenerator output is returned from whatever the
+tools had already produced.
+
+Limits are checked before each call, so a single in-flight LLM call or tool call
+is never interrupted; the token limit may be overshot by the last completion.
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+from smolagents import Model
+
+from tools import ReportGenerator
+
+
+class BudgetExceeded(Exception):
+    """Raised from inside a run when one of its budgets is exhausted."""
+
+    def __init__(self, limit: str, used, allowed):
+        super().__init__(f"{limit} budget exceeded: used {used} of {allowed}")
+        self.limit = limit
+        self.used = used
+        self.allowed = allowed
+
+
+class RunBudget:
+    """
+    Limits for a single agent run. `None` means unlimited.
+
+    Args:
+        max_tokens: Total LLM tokens (input + output) across the run.
+        max_seconds: Wall-clock seconds since the run started.
+        max_tool_calls: Number of tool calls (final_answer excluded).
+    """
+
+    def __init__(self, max_tokens=None, max_seconds=None, max_tool_calls=None):
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.max_tool_calls = max_tool_calls
+
+    @classmethod
+    def from_env(cls):
+        """Read NUTRITION_MAX_TOKENS, NUTRITION_MAX_SECONDS and NUTRITION_MAX_TOOL_CALLS."""
+        def read(var, cast):
+            value = os.getenv(var)
+            return cast(value) if value else None
+
+        return cls(
+            max_tokens=read("NUTRITION_MAX_TOKENS", int),
+            max_seconds=read("NUTRITION_MAX_SECONDS", float),
+            max_tool_calls=read("NUTRITION_MAX_TOOL_CALLS", int),
+        )
+
+    def is_unlimited(self) -> bool:
+        return self.max_tokens is None and self.max_seconds is None and self.max_tool_calls is None
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def _record(key):
+    with _metrics_lock:
+        _metrics[key] += 1
+
+
+def budget_metrics() -> dict:
+    """How many budgeted runs there were and how often each limit tripped."""
+    with _metrics_lock:
+        runs = _metrics["runs"]
+        tripped = _metrics["tripped"]
+        return {
+            "runs": runs,
+            "tripped": tripped,
+            "trip_rate": tripped / runs if runs else 0.0,
+            "by_limit": {k.split(":", 1)[1]: v for k, v in _metrics.items() if k.startswith("tripped:")},
+        }
+
+
+def reset_budget_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+# -----------------------------
+# Tracking
+# -----------------------------
+class BudgetTracker:
+    """Usage for the current run plus the last result of each tool."""
+
+    def __init__(self, budget: RunBudget):
+        self.budget = budget
+        self.start()
+
+    def start(self):
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.tool_calls = 0
+        self.exceeded = None
+        self.observations = {}
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def _trip(self, limit, used, allowed):
+        if self.exceeded is None:
+            self.exceeded = BudgetExceeded(limit, used, allowed)
+        raise self.exceeded
+
+    def check_clock(self):
+        b = self.budget
+        if b.max_seconds is not None and self.elapsed() >= b.max_seconds:
+            self._trip("wall_clock", round(self.elapsed(), 2), b.max_seconds)
+
+    def check(self):
+        """Before an LLM call: raise BudgetExceeded if any budget tripped, or time or tokens are exhausted."""
+        # A trip inside generated code becomes an observation, so the next call must stop the run.
+        if self.exceeded is not None:
+            raise self.exceeded
+        self.check_clock()
+        b = self.budget
+        if b.max_tokens is not None and self.tokens >= b.max_tokens:
+            self._trip("tokens", self.tokens, b.max_tokens)
+
+    def add_tokens(self, token_usage):
+        if token_usage is not None:
+            self.tokens += token_usage.input_tokens + token_usage.output_tokens
+
+    def count_tool_call(self):
+        """Before a tool call: raise BudgetExceeded if any budget tripped, or time or tool calls are exhausted."""
+        if self.exceeded is not None:
+            raise self.exceeded
+        self.check_clock()
+        b = self.budget
+        if b.max_tool_calls is not None and self.tool_calls >= b.max_tool_calls:
+            self._trip("tool_calls", self.tool_calls, b.max_tool_calls)
+        self.tool_calls += 1
+
+
+class BudgetedModel(Model):
+    """A model wrapper that charges every completion to a BudgetTracker."""
+
+    def __init__(self, model, tracker: BudgetTracker):
+        super().__init__(model_id=getattr(model, "model_id", None))
+        self.model = model
+        self.tracker = tracker
+
+    def generate(self, messages, *args, **kwargs):
+        self.tracker.check()
+        message = self.model.generate(messages, *args, **kwargs)
+        self.tracker.add_tokens(getattr(message, "token_usage", None))
+        return message
+
+    def generate_stream(self, messages, *args, **kwargs):
+        self.tracker.check()
+        for delta in self.model.generate_stream(messages, *args, **kwargs):
+            self.tracker.add_tokens(getattr(delta, "token_usage", None))
+            yield delta
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set on the wrapper (e.g. api_base).
+        model = self.__dict__.get("model")
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
+
+
+def _wrap_tool(tool, tracker: BudgetTracker):
+    forward = tool.forward
+
+    def budgeted_forward(*args, **kwargs):
+        tracker.count_tool_call()
+        result = forward(*args, **kwargs)
+        tracker.observations[tool.name] = {"args": args, "kwargs": kwargs, "result": result}
+        return result
+
+    tool.forward = budgeted_forward
+
+
+class BudgetedAgent:
+    """
+    Run an agent under a RunBudget, degrading to a partial report when it trips.
+
+    Wrapping mutates `agent` (its model and tools) and is meant to be done once.
+    """
+
+    def __init__(self, agent, budget: RunBudget):
+        self.agent = agent
+        self.budget = budget
+        self.tracker = BudgetTracker(budget)
+        agent.model = BudgetedModel(agent.model, self.tracker)
+        for tool in agent.tools.values():
+            if tool.name == "final_answer":
+                continue
+            if isinstance(getattr(tool, "model", None), Model):
+                tool.model = BudgetedModel(tool.model, self.tracker)
+            _wrap_tool(tool, self.tracker)
+
+    def run(self, task: str, user_info=None, **kwargs):
+        """
+        Run `task`. Returns the agent's answer, or a partial report if a budget tripped.
+
+        `user_info` ([name, age, weight, height, gender]) is used in the partial
+        report when the run stopped before any tool received it.
+        """
+        self.tracker.start()
+        _record("runs")
+        try:
+            answer = self.agent.run(task, **kwargs)
+        except Exception:
+            if self.tracker.exceeded is None:
+                raise
+            answer = None
+        if self.tracker.exceeded is None:
+            return answer
+
+        _record("tripped")
+        _record(f"tripped:{self.tracker.exceeded.limit}")
+        return self.partial_report(user_info)
+
+    def partial_report(self, user_info=None) -> str:
+        """Assemble a ReportGenerator report from the tool results gathered so far."""
+        obs = self.tracker.observations
+        note = f"Run stopped early: {self.tracker.exceeded}. Results below may be incomplete."
+
+        if "report_generator" in obs:
+            return f"{obs['report_generator']['result']}\nErrors:\n{note}"
+
+        def result(tool_name):
+            return obs.get(tool_name, {}).get("result")
+
+        def argument(tool_name, key, position):
+            call = obs.get(tool_name)
+            if not call:
+                return None
+            if key in call["kwargs"]:
+                return call["kwargs"][key]
+            return call["args"][position] if len(call["args"]) > position else None
+
+        lookup = result("nutrition_lookup")
+        totals = lookup.get("totals") if isinstance(lookup, dict) else None
+        deficits = result("deficit_calculator")
+        user_info = user_info or argument("deficit_calculator", "user_info", 1)
+        return ReportGenerator().forward(
+            user_info,
+            totals,
+            str(deficits) if deficits else None,
+            result("user_trends"),
+            errors=note,
+        )
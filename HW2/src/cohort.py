@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Cohort-wide analytics over every user file in the data directory.
+
+Files are split into chunks and scanned by a process pool. Each worker loads one
+user file at a time, runs the same guideline and trend computations as the
+DeficitCalculator and UserTrends tools over the requested date window, and folds
+the result into a small per-chunk aggregate. Only those aggregates travel back to
+the parent, so memory stays flat however many users there are and throughput
+grows with the number of worker processes.
+
+Usage:
+    python HW2/src/cohort.py --days 7            # e.g. who was in a protein deficit last week
+    python HW2/src/cohort.py --since 2025-09-01 --until 2025-09-30 --workers 8 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, timedelta
+
+import tools
+from tools import NUTRIENTS, classify, compute_guidelines, trend_stats
+
+TRENDS = ["rising", "stable", "falling"]
+
+
+def iter_user_files(data_dir):
+    """Yield the path of every `*.json` user file directly under `data_dir`."""
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".json") and entry.is_file():
+                yield entry.path
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def calorie_trend(history, tolerance=0.05) -> str:
+    """
+    Direction of daily calories over `history`: the least-squares slope across the
+    window, relative to the mean, beyond +/- `tolerance` is rising or falling.
+    """
+    values = [float(entry.get("totals", {}).get("calories", 0)) for entry in history]
+    n = len(values)
+    mean = sum(values) / n
+    x_mean = (n - 1) / 2
+    denom = sum((x - x_mean) ** 2 for x in range(n))
+    slope = sum((x - x_mean) * (v - mean) for x, v in enumerate(values)) / denom
+    change = slope * (n - 1) / mean if mean else 0.0
+    if change > tolerance:
+        return "rising"
+    if change < -tolerance:
+        return "falling"
+    return "stable"
+
+
+# -----------------------------
+# Aggregates
+# -----------------------------
+def empty_aggregate() -> dict:
+    return {
+        "files": 0,
+        "bytes": 0,
+        "users": 0,          # users with at least one logged day in the window
+        "inactive": 0,       # users with no logged days in the window
+        "unprofiled": 0,     # users missing age/weight/height/gender
+        "errors": 0,
+        "days": 0,
+        "status": {k: Counter() for k in NUTRIENTS},        # users by window-average status
+        "deficit_days": Counter(),                          # logged days in deficit, per nutrient
+        "trend": Counter(),                                 # users by calorie trend (2+ days)
+        "intake_sum": Counter(),                            # sum of per-user average intake
+    }
+
+
+def merge(total: dict, part: dict) -> dict:
+    """Fold aggregate `part` into `total` and return `total`."""
+    for key, value in part.items():
+        if isinstance(value, Counter):
+            total[key].update(value)
+        elif isinstance(value, dict):
+            for k, counter in value.items():
+                total[key][k].update(counter)
+        else:
+            total[key] += value
+    return total
+
+
+def scan_user(path, since=None, until=None, agg=None) -> dict:
+    """
+    Fold one user's history within [since, until] into `agg` (a new aggregate by default).
+    A file that cannot be read or analyzed only counts toward "errors" (and "bytes"):
+    its statistics are computed first and folded in once the whole file has succeeded.
+    """
+    agg = agg if agg is not None else empty_aggregate()
+    agg["files"] += 1
+    try:
+        agg["bytes"] += os.path.getsize(path)
+        with open(path, "r") as f:
+            user_data = json.load(f)
+        history = [
+            entry for entry in user_data.get("history", [])
+            if (since is None or entry.get("date", "") >= since) and (until is None or entry.get("date", "") <= until)
+        ]
+        profile = [user_data.get(k) for k in ["age", "weight", "height", "gender"]]
+        guidelines = compute_guidelines(*profile) if None not in profile else None
+
+        stats = trend_stats(history) if history else None
+        trend = None
+        if len(history) >= 2:
+            history.sort(key=lambda entry: entry.get("date", ""))
+            trend = calorie_trend(history)
+        status, deficit_days = {}, {}
+        if stats is not None and guidelines is not None:
+            for k, target in guidelines.items():
+                status[k] = classify(stats[k]["avg"], target)
+                deficit_days[k] = sum(
+                    1 for entry in history if classify(float(entry.get("totals", {}).get(k, 0)), target) == "Deficit"
+                )
+    except (OSError, ValueError, TypeError, AttributeError):
+        agg["errors"] += 1
+        return agg
+
+    if stats is None:
+        agg["inactive"] += 1
+        return agg
+    agg["users"] += 1
+    agg["days"] += len(history)
+    for k in NUTRIENTS:
+        agg["intake_sum"][k] += stats[k]["avg"]
+    if trend is not None:
+        agg["trend"][trend] += 1
+    if guidelines is None:
+        agg["unprofiled"] += 1
+        return agg
+    for k in guidelines:
+        agg["status"][k][status[k]] += 1
+        agg["deficit_days"][k] += deficit_days[k]
+    return agg
+
+
+def scan_chunk(paths, since=None, until=None) -> dict:
+    """Worker entry point: one aggregate for a chunk of user files."""
+    agg = empty_aggregate()
+    for path in paths:
+        scan_user(path, since, until, agg)
+    return agg
+
+
+def scan(data_dir=None, since=None, until=None, workers=None, chunk_size=256) -> dict:
+    """
+    Scan every user file in `data_dir` (defaults to tools.DATA_DIR) and return the
+    merged aggregate plus throughput figures under "throughput".
+
+    `workers=0` scans in the calling process. At most two chunks per worker are in
+    flight at once, so the pending work is bounded as well.
+    """
+    data_dir = data_dir or tools.DATA_DIR
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    total = empty_aggregate()
+    started = time.perf_counter()
+
+    chunks = chunked(iter_user_files(data_dir), chunk_size)
+    if workers == 0:
+        for chunk in chunks:
+            merge(total, scan_chunk(chunk, since, until))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(total, future.result())
+                pending.add(pool.submit(scan_chunk, chunk, since, until))
+            for future in pending:
+                merge(total, future.result())
+
+    elapsed = time.perf_counter() - started
+    total["window"] = {"since": since, "until": until}
+    total["throughput"] = {
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(total["files"] / elapsed, 1) if elapsed else None,
+        "mb_per_sec": round(total["bytes"] / 1e6 / elapsed, 2) if elapsed else None,
+    }
+    return total
+
+
+# -----------------------------
+# Output
+# -----------------------------
+def format_tables(agg: dict) -> str:
+    """Markdown tables for an aggregate returned by `scan`."""
+    window = agg["window"]
+    profiled = agg["users"] - agg["unprofiled"]
+    lines = [
+        f"Window: {window['since'] or 'start'} to {window['until'] or 'end'}",
+        f"Users active: {agg['users']} (of {agg['files']} files; {agg['inactive']} inactive, "
+        f"{agg['unprofiled']} without a profile, {agg['errors']} unreadable). Days logged: {agg['days']}.",
+        "",
+        "| Nutrient | Deficit | Balanced | Surplus | Deficit days | Avg intake |",
+        "|---|---|---|---|---|---|",
+    ]
+    for k in NUTRIENTS:
+        counts = agg["status"][k]
+        share = lambda n: f"{n} ({n / profiled:.0%})" if profiled else str(n)
+        avg_intake = agg["intake_sum"][k] / agg["users"] if agg["users"] else 0
+        lines.append(
+            f"| {k.capitalize()} | {share(counts['Deficit'])} | {share(counts['Balanced'])} | "
+            f"{share(counts['Surplus'])} | {agg['deficit_days'][k]} | {avg_intake:.1f} |"
+        )
+    lines += ["", "| Calorie trend | Users |", "|---|---|"]
+    lines += [f"| {t} | {agg['trend'][t]} |" for t in TRENDS]
+    t = agg["throughput"]
+    lines += ["", f"Scanned {agg['files']} files ({agg['bytes'] / 1e6:.1f} MB) in {t['seconds']}s with "
+                  f"{t['workers']} workers: {t['files_per_sec']} files/s, {t['mb_per_sec']} MB/s."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=None, help="Directory of user files (default: HW2/data).")
+    parser.add_argument("--since", help="First date to include (YYYY-MM-DD).")
+    parser.add_argument("--until", help="Last date to include (YYYY-MM-DD).")
+    parser.add_argument("--days", type=int, help="Only the last N days up to --until (default today).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 0 = inline).")
+    parser.add_argument("--chunk-size", type=int, default=256, help="User files per worker task.")
+    parser.add_argument("--json", action="store_true", help="Print the raw aggregate as JSON.")
+    args = parser.parse_args(argv)
+
+    since, until = args.since, args.until
+    if args.days:
+        end = date.fromisoformat(until) if until else date.today()
+        until = str(end)
+        since = str(end - timedelta(days=args.days - 1))
+
+    agg = scan(args.data_dir, since, until, workers=args.workers, chunk_size=args.chunk_size)
+    if args.json:
+        json.dump(agg, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_tables(agg))
+    return agg
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Columnar export of user histories for analytics.
+
+`export` flattens every user file in the data directory into one row per user
+per day (profile, totals, foods and the deficit analysis) and writes them to an
+Arrow IPC store partitioned by a stable hash of the user name:
+
+    HW2/columnar/
+        manifest.json           # per-user file mtime/size at the last export
+        bucket=03/part.arrow
+        bucket=11/part.arrow
+        ...
+
+Exports are incremental: only users whose file was added, changed or removed
+since the last run are re-read, and only their buckets are rewritten.
+
+ColumnarStore reads the store through memory maps, so queries touch only the
+columns and buckets they need and never parse the JSON files.
+
+Usage:
+    python HW2/src/columnar.py export [--rebuild]
+    python HW2/src/columnar.py trends Bob --since 2025-01-01
+    python HW2/src/columnar.py cohort --since 2025-09-14 --until 2025-09-20
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+import zlib
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import tools
+from tools import NUTRIENTS, classify, compute_guidelines
+
+STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "columnar")
+BUCKETS = 16
+MANIFEST = "manifest.json"
+
+SCHEMA = pa.schema(
+    [
+        ("user", pa.string()),
+        ("name", pa.string()),
+        ("age", pa.float64()),
+        ("weight", pa.float64()),
+        ("height", pa.float64()),
+        ("gender", pa.string()),
+        ("date", pa.date32()),
+        *[(k, pa.float64()) for k in NUTRIENTS],
+        ("foods", pa.list_(pa.string())),
+        *[(f"{k}_status", pa.string()) for k in NUTRIENTS],
+        *[(f"{k}_target", pa.float64()) for k in NUTRIENTS],
+    ]
+)
+
+_ANALYSIS = re.compile(r"^(Deficit|Balanced|Surplus): ([\d.]+) vs ([\d.]+)")
+
+
+def bucket_of(user: str, buckets: int = BUCKETS) -> int:
+    """Stable partition for `user` (independent of PYTHONHASHSEED)."""
+    return zlib.crc32(user.lower().encode("utf-8")) % buckets
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def user_rows(path) -> dict:
+    """Flatten one user file into column lists matching SCHEMA. Days with an invalid date are skipped."""
+    with open(path, "r") as f:
+        user_data = json.load(f)
+    user = os.path.splitext(os.path.basename(path))[0].lower()
+    columns = {field.name: [] for field in SCHEMA}
+    for entry in user_data.get("history", []):
+        try:
+            day = date.fromisoformat(entry.get("date", ""))
+        except (TypeError, ValueError):
+            continue
+        totals = entry.get("totals") or {}
+        analysis = entry.get("analysis") or {}
+        row = {
+            "user": user,
+            "name": user_data.get("name", user),
+            "age": _number(user_data.get("age")),
+            "weight": _number(user_data.get("weight")),
+            "height": _number(user_data.get("height")),
+            "gender": user_data.get("gender"),
+            "date": day,
+            "foods": [str(f) for f in entry.get("foods") or []],
+        }
+        for k in NUTRIENTS:
+            row[k] = _number(totals.get(k, 0)) or 0.0
+            match = _ANALYSIS.match(str(analysis.get(k, "")))
+            row[f"{k}_status"] = match.group(1) if match else None
+            row[f"{k}_target"] = float(match.group(3)) if match else None
+        for name, values in columns.items():
+            values.append(row[name])
+    return columns
+
+
+def _bucket_path(store_dir, bucket):
+    return os.path.join(store_dir, f"bucket={bucket:02d}", "part.arrow")
+
+
+def _read_bucket(store_dir, bucket):
+    """Memory-map one bucket. The map stays open for as long as the returned table is referenced."""
+    path = _bucket_path(store_dir, bucket)
+    if not os.path.exists(path):
+        return None
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _write_bucket(store_dir, bucket, table):
+    path = _bucket_path(store_dir, bucket)
+    if table.num_rows == 0:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f, pa.ipc.new_file(f, SCHEMA) as writer:
+        writer.write_table(table.sort_by([("user", "ascending"), ("date", "ascending")]))
+    os.replace(tmp_path, path)
+
+
+def _load_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def export(data_dir=None, store_dir=STORE_DIR, buckets=BUCKETS, rebuild=False) -> dict:
+    """
+    Bring the store at `store_dir` up to date with the user files in `data_dir`
+    (defaults to tools.DATA_DIR). Returns counts of added/updated/removed users
+    and the buckets rewritten.
+    """
+    data_dir = data_dir or tools.DATA_DIR
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = _load_manifest(store_dir)
+    if rebuild or manifest is None or manifest.get("buckets") != buckets:
+        for bucket in range(max(buckets, (manifest or {}).get("buckets", 0))):
+            path = _bucket_path(store_dir, bucket)
+            if os.path.exists(path):
+                os.remove(path)
+        manifest = {"buckets": buckets, "users": {}}
+
+    seen = {}
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".json") and entry.is_file():
+                st = entry.stat()
+                seen[entry.name[:-len(".json")].lower()] = {"path": entry.path, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    known = manifest["users"]
+    changed = {
+        user for user, info in seen.items()
+        if known.get(user, {}).get("mtime_ns") != info["mtime_ns"] or known.get(user, {}).get("size") != info["size"]
+    }
+    removed = set(known) - set(seen)
+    added = changed - set(known)
+
+    by_bucket = {}
+    for user in changed | removed:
+        by_bucket.setdefault(bucket_of(user, buckets), set()).add(user)
+
+    skipped = []
+    for bucket, users in sorted(by_bucket.items()):
+        parts = []
+        existing = _read_bucket(store_dir, bucket)
+        if existing is not None:
+            keep = pc.invert(pc.is_in(existing["user"], value_set=pa.array(sorted(users), pa.string())))
+            parts.append(existing.filter(keep))
+        for user in sorted(users & changed):
+            try:
+                parts.append(pa.Table.from_pydict(user_rows(seen[user]["path"]), schema=SCHEMA))
+            except (OSError, ValueError):
+                skipped.append(user)  # unreadable right now; retried on the next export
+        _write_bucket(store_dir, bucket, pa.concat_tables(parts) if parts else SCHEMA.empty_table())
+
+    for user in removed:
+        known.pop(user, None)
+    for user in changed:
+        if user in skipped:
+            known.pop(user, None)
+        else:
+            known[user] = {"mtime_ns": seen[user]["mtime_ns"], "size": seen[user]["size"]}
+
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST))
+
+    return {
+        "added": len(added),
+        "updated": len(changed - added),
+        "removed": len(removed),
+        "skipped": skipped,
+        "buckets_written": sorted(by_bucket),
+    }
+
+
+class ColumnarStore:
+    """
+    Read-only, memory-mapped view of a store written by `export`.
+
+    Tables returned here reference the mapped files directly; filtering and
+    aggregation run in Arrow without copying the underlying columns.
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        manifest = _load_manifest(store_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No columnar store at {store_dir}; run `columnar.py export` first.")
+        self.buckets = manifest["buckets"]
+
+    def _open(self, bucket, columns):
+        table = _read_bucket(self.store_dir, bucket)
+        if table is None:
+            return None
+        return table.select(columns) if columns else table
+
+    def table(self, users=None, since=None, until=None, columns=None) -> pa.Table:
+        """
+        Rows for `users` (all users by default) with since <= date <= until.
+        Only the buckets holding `users` are opened; `columns` restricts the output.
+        """
+        names = sorted({u.lower() for u in users}) if users else None
+        buckets = sorted({bucket_of(u, self.buckets) for u in names}) if names else range(self.buckets)
+        needed = None
+        if columns:
+            needed = list(dict.fromkeys([*columns, "user", "date"]))
+        tables = [t for t in (self._open(b, needed) for b in buckets) if t is not None]
+        if not tables:
+            return SCHEMA.empty_table().select(columns) if columns else SCHEMA.empty_table()
+        table = pa.concat_tables(tables)
+
+        conditions = []
+        if names:
+            conditions.append(pc.is_in(table["user"], value_set=pa.array(names, pa.string())))
+        if since:
+            conditions.append(pc.greater_equal(table["date"], pa.scalar(date.fromisoformat(since))))
+        if until:
+            conditions.append(pc.less_equal(table["date"], pa.scalar(date.fromisoformat(until))))
+        if conditions:
+            mask = conditions[0]
+            for condition in conditions[1:]:
+                mask = pc.and_(mask, condition)
+            table = table.filter(mask)
+        return table.select(columns) if columns else table
+
+    def user_stats(self, user, since=None, until=None) -> dict:
+        """Same shape as tools.trend_stats (avg/min/max per nutrient), plus "days"."""
+        table = self.table([user], since, until, columns=NUTRIENTS)
+        stats = {"days": table.num_rows}
+        for k in NUTRIENTS:
+            if table.num_rows:
+                min_max = pc.min_max(table[k]).as_py()
+                stats[k] = {"avg": pc.mean(table[k]).as_py(), "min": min_max["min"], "max": min_max["max"]}
+            else:
+                stats[k] = {"avg": 0, "min": 0, "max": 0}
+        return stats
+
+    def cohort_status(self, since=None, until=None) -> dict:
+        """
+        Users in deficit/balanced/surplus per nutrient, by their average intake over the
+        window against their personal guidelines (as cohort.py computes from the JSON files).
+        """
+        table = self.table(since=since, until=until,
+                           columns=["user", "age", "weight", "height", "gender", *NUTRIENTS])
+        per_user = table.group_by("user").aggregate(
+            [(k, "mean") for k in NUTRIENTS] + [(k, "max") for k in ["age", "weight", "height"]] + [("gender", "max")]
+        ).to_pylist()
+        status = {k: {"Deficit": 0, "Balanced": 0, "Surplus": 0} for k in NUTRIENTS}
+        unprofiled = 0
+        for row in per_user:
+            profile = [row["age_max"], row["weight_max"], row["height_max"], row["gender_max"]]
+            if None in profile:
+                unprofiled += 1
+                continue
+            for k, target in compute_guidelines(*profile).items():
+                status[k][classify(row[f"{k}_mean"], target)] += 1
+        return {"users": len(per_user), "unprofiled": unprofiled, "days": table.num_rows, "status": status}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=STORE_DIR, help="Columnar store directory (default: HW2/columnar).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Create or incrementally update the store.")
+    export_cmd.add_argument("--data-dir", default=None, help="Directory of user files (default: HW2/data).")
+    export_cmd.add_argument("--buckets", type=int, default=BUCKETS)
+    export_cmd.add_argument("--rebuild", action="store_true", help="Rewrite every bucket from scratch.")
+
+    trends_cmd = commands.add_parser("trends", help="Average/min/max daily totals for one user.")
+    trends_cmd.add_argument("user")
+    cohort_cmd = commands.add_parser("cohort", help="Users in deficit/balanced/surplus per nutrient.")
+    for cmd in (trends_cmd, cohort_cmd):
+        cmd.add_argument("--since", help="First date to include (YYYY-MM-DD).")
+        cmd.add_argument("--until", help="Last date to include (YYYY-MM-DD).")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        result = export(args.data_dir, args.store, buckets=args.buckets, rebuild=args.rebuild)
+    elif args.command == "trends":
+        result = ColumnarStore(args.store).user_stats(args.user, args.since, args.until)
+    else:
+        result = ColumnarStore(args.store).cohort_status(args.since, args.until)
+    print(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Caching of per-food Nutritionix results, the per-user food frequency index
+used to warm that cache, and per-user results of the precompute job.
+
+- LookupCache: thread-safe in-memory TTL/LRU cache keyed by a normalized food phrase.
+- FoodFrequencyIndex: per-user counts of the food phrases users type, stored as
+  `<data_dir>/index/<user>.json`, seeded once from the user's history and
+  updated incrementally on every log.
+- PrecomputedStore: guidelines, per-day analysis, trend statistics and narrative
+  for each user, stored as `<data_dir>/precomputed/<user>.json` and stamped with
+  the history they were computed from.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+def normalize_food(food: str) -> str:
+    """Canonical form of one food phrase: lowercased, whitespace collapsed."""
+    return re.sub(r"\s+", " ", food).strip().lower()
+
+
+class LookupCache:
+    """
+    Map a food phrase to its Nutritionix food items for `ttl` seconds, keeping at
+    most `max_entries` (least recently used are dropped). A ttl of 0 or less
+    disables the cache: every `get` misses and `put` stores nothing.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stored_at, items)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: str):
+        """Cached items for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[0] <= self.ttl
+
+    def put(self, key: str, items: list[dict]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), items)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class FoodFrequencyIndex:
+    """
+    How often each user has logged each food phrase, counted by `record` as new
+    logs are written. Phrases are the normalized text the user typed, the same
+    keys NutritionLookup caches under, so warming the top phrases warms exactly
+    what the user's next lookups ask for.
+
+    A user without an index (one who logged before it existed) is seeded once
+    from the food names in their history, used as phrases: "banana" then warms
+    a later lookup of "banana", though not one of "1 medium banana".
+
+    Use `shared(data_dir)` so every writer in the process goes through one
+    instance (and one lock) per directory.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, data_dir: str) -> "FoodFrequencyIndex":
+        """The process-wide index for `data_dir`."""
+        key = os.path.abspath(data_dir)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(data_dir)
+            return cls._shared[key]
+
+    def _path(self, user):
+        return os.path.join(self.data_dir, "index", f"{user.lower()}.json")
+
+    def _load(self, user) -> Counter:
+        try:
+            with open(self._path(user), "r") as f:
+                return Counter(json.load(f)["counts"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        counts = self._from_history(user)
+        if counts:
+            self._save(user, counts)
+        return counts
+
+    def _from_history(self, user) -> Counter:
+        try:
+            with open(os.path.join(self.data_dir, f"{user.lower()}.json"), "r") as f:
+                history = json.load(f).get("history", [])
+        except (FileNotFoundError, json.JSONDecodeError):
+            return Counter()
+        return Counter(
+            normalize_food(str(food))
+            for entry in history
+            for food in entry.get("foods", [])
+            if str(food).strip()
+        )
+
+    def _save(self, user, counts: Counter):
+        path = self._path(user)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"user": user.lower(), "counts": counts}, f)
+        os.replace(tmp_path, path)
+
+    def record(self, user: str, foods: list[str]):
+        """Count one more log of each phrase in `foods` for `user`."""
+        with self._lock:
+            counts = self._load(user)
+            counts.update(foods)
+            self._save(user, counts)
+
+    def top(self, user: str, n: int = 10) -> list[str]:
+        """The user's `n` most frequently logged food phrases."""
+        with self._lock:
+            counts = self._load(user)
+        return [food for food, _ in counts.most_common(n)]
+
+
+# Bump when the precomputed record layout or the computations behind it change;
+# records with another version are recomputed and never served.
+PRECOMPUTE_VERSION = 2
+
+PROFILE_FIELDS = ["age", "weight", "height", "gender"]
+
+
+def last_date(user_data: dict) -> str | None:
+    """The latest logged date in the user's history, or None if nothing is logged."""
+    return max((entry["date"] for entry in user_data.get("history", []) if entry.get("date")), default=None)
+
+
+def history_stamp(user_data: dict, through: str | None) -> str:
+    """
+    Hash of what a precomputed record covers: the user's profile and the foods
+    and totals of every day logged on or before `through`. Days logged later,
+    and the analysis deficit_calculator adds to a day, do not change it.
+    """
+    covered = {
+        "profile": [user_data.get(field) for field in PROFILE_FIELDS],
+        "history": [
+            [entry.get("date"), entry.get("foods", []), entry.get("totals", {})]
+            for entry in user_data.get("history", [])
+            if through is not None and entry.get("date") and entry["date"] <= through
+        ],
+    }
+    return hashlib.sha1(json.dumps(covered, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PrecomputedStore:
+    """
+    Per-user records written by the precompute job, each covering the user's
+    history `through` its last logged date. A record stays valid while its
+    version is PRECOMPUTE_VERSION and the days it covers are unchanged, so
+    logging a new day keeps it valid but editing a covered day does not.
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+
+    def _path(self, user):
+        return os.path.join(self.data_dir, "precomputed", f"{user.lower()}.json")
+
+    def load(self, user: str, user_data: dict = None) -> dict | None:
+        """The user's record if it is valid (for `user_data`, when given), else None."""
+        try:
+            with open(self._path(user), "r") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if record.get("version") != PRECOMPUTE_VERSION:
+            return None
+        if user_data is not None and record.get("stamp") != history_stamp(user_data, record.get("through")):
+            return None
+        return record
+
+    def save(self, user: str, record: dict):
+        path = self._path(user)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({**record, "version": PRECOMPUTE_VERSION}, f, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Off-peak precomputation of each user's deficit analysis and trend summary.
+
+For every user with days logged or edited since the last run, computes their guidelines,
+the deficit/surplus analysis of each logged day, the user_trends statistics and
+the LLM trend narrative, and stores them as `data/precomputed/<user>.json`,
+stamped with PRECOMPUTE_VERSION and the history they cover (through the last
+logged date). UserTrends then serves the stored narrative without calling the
+model: days logged later only update the statistics summary, computed live,
+while editing a covered day invalidates the record.
+
+Run it nightly, e.g. from cron:
+
+    0 3 * * *  cd /path/to/repo && make precompute2
+
+Usage:
+    python HW2/src/precompute.py [--workers 4] [--user Kevin ...] [--force] [--json]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import tools
+from nutrition_cache import PROFILE_FIELDS, PrecomputedStore, history_stamp, last_date
+from tools import analyze_totals, compute_guidelines, response_text, trend_prompt, trend_stats
+
+
+def precompute_user(user: str, model, store: PrecomputedStore = None, force: bool = False) -> str:
+    """
+    Recompute `user`'s record unless it still covers their whole history. Returns
+    "fresh" (skipped), "computed", or "missing" (no user file).
+    """
+    store = store or PrecomputedStore(tools.DATA_DIR)
+    try:
+        with open(os.path.join(tools.DATA_DIR, f"{user.lower()}.json"), "r") as f:
+            user_data = json.load(f)
+    except FileNotFoundError:
+        return "missing"
+    through = last_date(user_data)
+    if not force:
+        record = store.load(user, user_data)
+        if record is not None and record.get("through") == through:
+            return "fresh"
+
+    history = user_data.get("history", [])
+    guidelines = None
+    if all(user_data.get(field) is not None for field in PROFILE_FIELDS):
+        guidelines = compute_guidelines(*(user_data[field] for field in PROFILE_FIELDS))
+
+    summary, messages = trend_prompt(user_data)
+    narrative = response_text(model(messages)) if messages is not None else ""
+
+    store.save(user, {
+        "user": user.lower(),
+        "through": through,
+        "stamp": history_stamp(user_data, through),
+        "computed_at": datetime.now().isoformat(timespec="seconds"),
+        "guidelines": guidelines,
+        "days": {
+            entry["date"]: analyze_totals(entry.get("totals", {}), guidelines)
+            for entry in history
+            if guidelines is not None and "date" in entry
+        },
+        "stats": trend_stats(history) if history else None,
+        "summary": summary,
+        "narrative": narrative,
+    })
+    return "computed"
+
+
+def list_users(data_dir) -> list[str]:
+    with os.scandir(data_dir) as entries:
+        return sorted(e.name[:-len(".json")] for e in entries if e.name.endswith(".json") and e.is_file())
+
+
+def run(model, users=None, workers: int = 4, force: bool = False) -> dict:
+    """
+    Precompute every user in tools.DATA_DIR (or just `users`) with at most
+    `workers` users, and so at most `workers` model calls, in flight at a time.
+    Returns counts of computed/fresh users, per-user errors and elapsed seconds.
+    """
+    users = users or list_users(tools.DATA_DIR)
+    store = PrecomputedStore(tools.DATA_DIR)
+    result = {"users": len(users), "computed": 0, "fresh": 0, "missing": 0, "errors": {}}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="precompute") as pool:
+        futures = {user: pool.submit(precompute_user, user, model, store, force) for user in users}
+        for user, future in futures.items():
+            try:
+                result[future.result()] += 1
+            except Exception as e:
+                # One bad file or failed model call should not stop the nightly run.
+                result["errors"][user] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("NUTRITION_PRECOMPUTE_WORKERS", "4")),
+                        help="Users (and model calls) processed concurrently.")
+    parser.add_argument("--user", action="append", dest="users", help="Only this user (repeatable).")
+    parser.add_argument("--force", action="store_true", help="Recompute even if the stored record is still valid.")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+    args = parser.parse_args(argv)
+
+    import agent  # builds the same (optionally cached) model the interactive agent uses
+
+    result = run(agent.model, args.users, args.workers, args.force)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['computed']} computed, {result['fresh']} unchanged, {len(result['errors'])} failed "
+              f"of {result['users']} users in {result['seconds']:.1f}s")
+        for user, error in result["errors"].items():
+            print(f"  {user}: {error}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
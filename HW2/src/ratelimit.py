@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Rate limiting and request coalescing for upstream API calls.
+
+- TokenBucket: a thread-safe token bucket shared by every caller in the process.
+- SingleFlight: concurrent calls with the same key share one in-flight call and its result.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Allow `rate` calls per second on average with bursts of up to `capacity`.
+
+    `acquire()` blocks until a token is available (or `timeout` seconds pass).
+    `defer(seconds)` empties the bucket and holds it closed, e.g. after an
+    upstream 429 with a Retry-After header. A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self._updated:
+            start = max(self._updated, self._blocked_until)
+            if now > start:
+                self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+            self._updated = now
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def defer(self, seconds: float):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls by key.
+
+    The first caller for a key runs `fn()`; callers arriving while it is in flight
+    wait and receive the same result (or exception). Nothing is cached afterwards.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
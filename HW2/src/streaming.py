@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Incremental output for an agent run.
+
+`stream_agent_run` runs the agent in a background thread and yields report
+fragments as soon as the tools compute them: daily totals when
+nutrition_lookup returns, deficits when deficit_calculator returns, and the
+trends summary followed by the LLM narrative token by token from user_trends.
+Once iteration is over, the agent's final answer is available as `.answer`.
+
+Fragments are plain text meant to be printed back to back, e.g.
+
+    stream = stream_agent_run(agent, query)
+    for fragment in stream:
+        print(fragment, end="", flush=True)
+    full_report = stream.answer
+"""
+import queue
+import threading
+
+from tools import ReportGenerator
+
+_DONE = object()
+
+
+class _ToolHooks:
+    """Temporarily wrap tool `forward` methods of an agent; undone by `restore()`."""
+
+    def __init__(self, agent):
+        self.tools = agent.tools
+        self._saved = []
+
+    def wrap(self, name, on_result, before=None):
+        tool = self.tools.get(name)
+        if tool is None:
+            return None
+        self._saved.append((tool, "forward", tool.__dict__.get("forward")))
+        forward = tool.forward
+
+        def hooked_forward(*args, **kwargs):
+            if before is not None:
+                before()
+            result = forward(*args, **kwargs)
+            on_result(result)
+            return result
+
+        tool.forward = hooked_forward
+        return tool
+
+    def set(self, tool, attr, value):
+        self._saved.append((tool, attr, tool.__dict__.get(attr)))
+        setattr(tool, attr, value)
+
+    def restore(self):
+        for tool, attr, value in reversed(self._saved):
+            if value is None and attr == "forward":
+                tool.__dict__.pop("forward", None)
+            else:
+                setattr(tool, attr, value)
+        self._saved.clear()
+
+
+class AgentStream:
+    """
+    Iterable over the fragments of one agent run; the run starts when iteration
+    does. `answer` holds the agent's final answer once iteration has finished.
+    """
+
+    def __init__(self, agent, task, run=None, **kwargs):
+        self.agent = agent
+        self.task = task
+        self.run = run or agent.run
+        self.kwargs = kwargs
+        self.answer = None
+
+    def __iter__(self):
+        events = queue.Queue()
+        hooks = _ToolHooks(self.agent)
+
+        def on_lookup(result):
+            if isinstance(result, dict) and result.get("totals"):
+                events.put(ReportGenerator.section("totals", result["totals"]) + "\n")
+
+        def on_deficits(result):
+            text = ReportGenerator.section("deficits", result)
+            if text:
+                events.put(text + "\n")
+
+        hooks.wrap("nutrition_lookup", on_lookup)
+        hooks.wrap("deficit_calculator", on_deficits)
+        trends = hooks.wrap("user_trends", lambda result: events.put("\n"),
+                            before=lambda: events.put(ReportGenerator.TITLES["trends"]))
+        if trends is not None:
+            hooks.set(trends, "on_chunk", events.put)
+
+        outcome = {}
+
+        def worker():
+            try:
+                outcome["answer"] = self.run(self.task, **self.kwargs)
+            except BaseException as e:  # re-raised in the consuming thread
+                outcome["error"] = e
+            finally:
+                events.put(_DONE)
+
+        thread = threading.Thread(target=worker, name="agent-run", daemon=True)
+        thread.start()
+        try:
+            while True:
+                fragment = events.get()
+                if fragment is _DONE:
+                    break
+                yield fragment
+        finally:
+            thread.join()
+            hooks.restore()
+
+        if "error" in outcome:
+            raise outcome["error"]
+        self.answer = outcome["answer"]
+
+
+def stream_agent_run(agent, task, run=None, **kwargs) -> AgentStream:
+    """
+    Run `task` on `agent`, yielding output fragments as they become available.
+
+    Args:
+        agent: A CodeAgent built over the nutrition tools.
+        task: The user query.
+        run: Callable used to run the task (defaults to `agent.run`); pass
+            `BudgetedAgent(agent, budget).run` to stream a budgeted run.
+        **kwargs: Forwarded to `run`.
+    """
+    return AgentStream(agent, task, run, **kwargs)
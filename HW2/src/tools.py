@@ -5,8 +5,144 @@ import requests
 from smolagents import Tool
 from datetime import date
 
+from ratelimit import SingleFlight, TokenBucket
+from nutrition_cache import FoodFrequencyIndex, LookupCache, PrecomputedStore, normalize_food
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 os.makedirs(DATA_DIR, exist_ok=True)
+NUTRITIONIX_URL = os.getenv("NUTRITIONIX_URL", "https://trackapi.nutritionix.com/v2/natural/nutrients")
+
+# Shared by every NutritionLookup in the process: a quota-friendly rate limit and
+# coalescing of identical in-flight queries.
+NUTRITIONIX_LIMITER = TokenBucket(
+    rate=float(os.getenv("NUTRITIONIX_RATE", "5")),
+    capacity=float(os.getenv("NUTRITIONIX_BURST", "10")),
+)
+NUTRITIONIX_FLIGHT = SingleFlight()
+NUTRITIONIX_TIMEOUT = float(os.getenv("NUTRITIONIX_TIMEOUT", "30"))  # seconds, both waiting for a token and for the HTTP response
+
+# Per-food results, warmed from each user's most frequent foods. Off unless
+# NUTRITIONIX_CACHE_TTL is set to a positive number of seconds.
+NUTRITION_CACHE = LookupCache(
+    ttl=float(os.getenv("NUTRITIONIX_CACHE_TTL", "0")),
+    max_entries=int(os.getenv("NUTRITIONIX_CACHE_MAX_ENTRIES", "10000")),
+)
+
+
+NUTRIENTS = ["calories", "protein", "carbs", "fat"]
+
+
+def compute_guidelines(age, weight, height, gender) -> dict:
+    """Personalized daily targets for calories and macros."""
+    # Basal Metabolic Rate (Mifflin-St Jeor Equation)
+    if gender.lower() == "male":
+        bmr = 10 * weight + 6.25 * height - 5 * age + 5
+    else:
+        bmr = 10 * weight + 6.25 * height - 5 * age - 161
+
+    # Assume sedentary activity factor (1.2)
+    calories_target = round(bmr * 1.2)
+
+    # Protein target (0.8 g per kg body weight)
+    protein_target = round(weight * 0.8)
+
+    # Carb target (45–65% calories → use ~55%)
+    carbs_target = round((calories_target * 0.55) / 4)
+
+    # Fat target (25–35% calories → use ~30%)
+    fat_target = round((calories_target * 0.3) / 9)
+
+    return {
+        "calories": calories_target,
+        "protein": protein_target,
+        "carbs": carbs_target,
+        "fat": fat_target,
+    }
+
+
+def classify(actual: float, target: float) -> str:
+    """Deficit below 90% of target, Surplus above 110%, else Balanced."""
+    if actual < target * 0.9:
+        return "Deficit"
+    if actual > target * 1.1:
+        return "Surplus"
+    return "Balanced"
+
+
+def analyze_totals(totals: dict, guidelines: dict) -> dict:
+    """Compare actual totals against guideline targets, e.g. {"protein": "Deficit: 40.0 vs 62"}."""
+    analysis = {}
+    for k, target in guidelines.items():
+        actual = float(totals.get(k, 0))
+        analysis[k] = f"{classify(actual, target)}: {actual:.1f} vs {target}"
+    return analysis
+
+
+def trend_stats(history: list[dict]) -> dict:
+    """Average, minimum and maximum of each nutrient's daily totals across `history`."""
+    stats = {}
+    for k in NUTRIENTS:
+        values = [float(entry.get("totals", {}).get(k, 0)) for entry in history]
+        stats[k] = {
+            "avg": sum(values) / len(values) if values else 0,
+            "min": min(values) if values else 0,
+            "max": max(values) if values else 0,
+        }
+    return stats
+
+
+def trend_prompt(user_data: dict):
+    """
+    The statistics summary of a user's history and the messages asking the model
+    for a narrative. Returns (message, None) when there is nothing to summarize.
+    """
+    history = user_data.get("history", [])
+    if len(history) < 2:
+        return "Not enough history to analyze trends.", None
+
+    stats = trend_stats(history)
+
+    # Build summary
+    summary = (
+        f"Over the past {len(history)} days:\n"
+        f"- Calories averaged {stats['calories']['avg']:.0f} kcal/day "
+        f"(range {stats['calories']['min']}–{stats['calories']['max']}).\n"
+        f"- Protein averaged {stats['protein']['avg']:.1f} g/day "
+        f"(range {stats['protein']['min']}–{stats['protein']['max']}).\n"
+        f"- Carbs averaged {stats['carbs']['avg']:.1f} g/day "
+        f"(range {stats['carbs']['min']}–{stats['carbs']['max']}).\n"
+        f"- Fat averaged {stats['fat']['avg']:.1f} g/day "
+        f"(range {stats['fat']['min']}–{stats['fat']['max']}).\n\n"
+    )
+
+    # Prompt Gemini for a summary
+    prompt = (
+        "You are a nutrition assistant. Based on these statistics and user data, write a concise summary "
+        "of the user's nutrition trends in 3 sentences or less. Be specific but encouraging.\n\n"
+        f"User: {json.dumps(user_data, indent=2)}\n"
+        f"Stats: {json.dumps(stats, indent=2)}\n"
+        f"Days tracked: {len(history)}"
+    )
+
+    messages = [
+        {"role": "system", "content": "You are a helpful nutrition assistant."},
+        {"role": "user", "content": prompt},
+    ]
+    return summary, messages
+
+
+def response_text(response) -> str:
+    """The text of a model response (ChatMessage, dict or string)."""
+    # If it's a ChatMessage object, grab the content
+    if hasattr(response, "content"):
+        return response.content
+    elif isinstance(response, dict) and "content" in response:
+        return response["content"]
+    elif isinstance(response, str):
+        return response
+    else:
+        return str(response)
+
 
 # -----------------------------
 # 1. Nutrition Lookup
@@ -47,27 +183,75 @@ class NutritionLookup(Tool):
         if not self.app_id or not self.app_key:
             raise ValueError("Missing NUTRITIONIX_APP_ID or NUTRITIONIX_API_KEY.")
 
-    def forward(self, food: list[str], name: str, log_date: str) -> dict:
-        if not isinstance(food, list) or not food or not all(isinstance(f, str) and f.strip() for f in food):
-            raise ValueError("`food` must be a non-empty list of non-empty strings.")
-        if not isinstance(name, str) or not name.strip():
-            raise ValueError("`name` must be a non-empty string.")
-        if not isinstance(log_date, str) or not log_date.strip():
-            raise ValueError("`log_date` must be a non-empty string.")
+    def _fetch(self, query: str) -> list[dict]:
+        """POST a normalized query to Nutritionix under the shared rate limit."""
+        if not NUTRITIONIX_LIMITER.acquire(timeout=NUTRITIONIX_TIMEOUT):
+            raise RuntimeError("Nutritionix rate limit: timed out waiting for a request slot.")
 
-        url = "https://trackapi.nutritionix.com/v2/natural/nutrients"
         headers = {
             "x-app-id": self.app_id,
             "x-app-key": self.app_key,
             "Content-Type": "application/json",
         }
-        payload = {"query": ", ".join(food)}
-        response = requests.post(url, headers=headers, json=payload)
+        payload = {"query": query}
+        response = requests.post(NUTRITIONIX_URL, headers=headers, json=payload, timeout=NUTRITIONIX_TIMEOUT)
 
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "1")
+            NUTRITIONIX_LIMITER.defer(float(retry_after) if retry_after.isdigit() else 1.0)
         if response.status_code != 200:
             raise RuntimeError(f"Nutritionix API error: {response.status_code} - {response.text}")
 
-        data = response.json().get("foods", [])
+        return response.json().get("foods", [])
+
+    def _lookup(self, items: list[str]) -> list[dict]:
+        """Food items for normalized phrases `items`, from NUTRITION_CACHE when every phrase is cached."""
+        if NUTRITION_CACHE.enabled:
+            cached = [NUTRITION_CACHE.get(item) for item in items]
+            if all(c is not None for c in cached):
+                return [food for c in cached for food in c]
+
+        query = ", ".join(items)
+        data = NUTRITIONIX_FLIGHT.do(query, lambda: self._fetch(query))
+        if NUTRITION_CACHE.enabled and data:
+            if len(items) == 1:
+                NUTRITION_CACHE.put(items[0], data)
+            elif [normalize_food(food.get("food_name", "")) for food in data] == items:
+                # Each food is named exactly as its phrase, so the response lines up
+                # with the query; anything less (e.g. "rice and beans" -> rice, beans
+                # next to an unmatched phrase) could file foods under the wrong phrase.
+                for item, food in zip(items, data):
+                    NUTRITION_CACHE.put(item, [food])
+        return data
+
+    def prefetch(self, food: list[str]) -> int:
+        """
+        Fetch each phrase in `food` that is not cached yet into NUTRITION_CACHE.
+        Best effort: phrases that fail to fetch are skipped. Returns how many were fetched.
+        """
+        fetched = 0
+        for item in dict.fromkeys(normalize_food(f) for f in food if f.strip()):
+            if item in NUTRITION_CACHE:
+                continue
+            try:
+                data = NUTRITIONIX_FLIGHT.do(item, lambda item=item: self._fetch(item))
+            except (RuntimeError, requests.RequestException):
+                continue
+            if data:
+                NUTRITION_CACHE.put(item, data)
+                fetched += 1
+        return fetched
+
+    def forward(self, food: list[str], name: str, log_date: str) -> dict:
+        if not isinstance(food, list) or not food or not all(isinstance(f, str) and f.strip() for f in food):
+            raise ValueError("`food` must be a non-empty list of non-empty strings.")
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("`name` must be a non-empty string.")
+        if not isinstance(log_date, str) or not log_date.strip():
+            raise ValueError("`log_date` must be a non-empty string.")
+
+        items = [normalize_food(f) for f in food]
+        data = self._lookup(items)
         totals = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0}
         foods_logged = []
 
@@ -95,6 +279,9 @@ class NutritionLookup(Tool):
         today_entry["foods"].extend(foods_logged)
         today_entry["totals"] = totals
 
+        # Keep the frequency index used for cache warming current
+        FoodFrequencyIndex.shared(DATA_DIR).record(name, items)
+
         with open(filepath, "w") as f:
             json.dump(user_data, f, indent=2)
 
@@ -222,83 +409,75 @@ class UserTrends(Tool):
             inputs=self.inputs,
         )
         self.model = model  # Pass in Gemini/OpenAI model
-        
-    def forward(self, user: str) -> str:
+        self.on_chunk = None  # Optional callback; when set, forward() streams output through it
+
+    def _prepare(self, user: str):
+        """
+        Compute the statistics summary for `user` and either the nightly precomputed
+        narrative or the prompt to generate one. Returns (summary, messages, narrative):
+        `narrative` is set when the precomputed one still covers the user's history,
+        and `messages` is None when there is nothing for the model to summarize.
+        """
         if not user:
-            return "No user name provided."
+            return "No user name provided.", None, None
 
         filepath = os.path.join(DATA_DIR, f"{user.lower()}.json")
         if not os.path.exists(filepath):
-            return f"No data found for user {user}."
+            return f"No data found for user {user}.", None, None
 
         with open(filepath, "r") as f:
             user_data = json.load(f)
 
-        history = user_data.get("history", [])
-        if len(history) < 2:
-            return "Not enough history to analyze trends."
-
-        # Extract daily totals for analysis
-        daily_totals = []
-        for entry in history:
-            totals = entry.get("totals", {})
-            daily_totals.append({
-                "calories": float(totals.get("calories", 0)),
-                "protein": float(totals.get("protein", 0)),
-                "carbs": float(totals.get("carbs", 0)),
-                "fat": float(totals.get("fat", 0)),
-            })
-
-        calorie_vals = [day["calories"] for day in daily_totals]
-        protein_vals = [day["protein"] for day in daily_totals]
-        carb_vals = [day["carbs"] for day in daily_totals]
-        fat_vals = [day["fat"] for day in daily_totals]
-
-        def avg(values): return sum(values) / len(values) if values else 0
-
-        stats = {
-            "calories": {"avg": avg(calorie_vals), "min": min(calorie_vals), "max": max(calorie_vals)},
-            "protein": {"avg": avg(protein_vals), "min": min(protein_vals), "max": max(protein_vals)},
-            "carbs": {"avg": avg(carb_vals), "min": min(carb_vals), "max": max(carb_vals)},
-            "fat": {"avg": avg(fat_vals), "min": min(fat_vals), "max": max(fat_vals)},
-        }
-
-        # Build summary
-        summary = (
-            f"Over the past {len(history)} days:\n"
-            f"- Calories averaged {stats['calories']['avg']:.0f} kcal/day "
-            f"(range {stats['calories']['min']}–{stats['calories']['max']}).\n"
-            f"- Protein averaged {stats['protein']['avg']:.1f} g/day "
-            f"(range {stats['protein']['min']}–{stats['protein']['max']}).\n"
-            f"- Carbs averaged {stats['carbs']['avg']:.1f} g/day "
-            f"(range {stats['carbs']['min']}–{stats['carbs']['max']}).\n"
-            f"- Fat averaged {stats['fat']['avg']:.1f} g/day "
-            f"(range {stats['fat']['min']}–{stats['fat']['max']}).\n\n"
-        )
-
-        # Prompt Gemini for a summary
-        prompt = (
-            "You are a nutrition assistant. Based on these statistics and user data, write a concise summary "
-            "of the user's nutrition trends in 3 sentences or less. Be specific but encouraging.\n\n"
-            f"User: {json.dumps(user_data, indent=2)}\n"
-            f"Stats: {json.dumps(stats, indent=2)}\n"
-            f"Days tracked: {len(history)}"
-        )
+        summary, messages = trend_prompt(user_data)
+        if messages is None:
+            return summary, None, None
+        # Days logged after the precompute run only change the (cheap) summary above.
+        record = PrecomputedStore(DATA_DIR).load(user, user_data)
+        narrative = record["narrative"] if record and record.get("narrative") else None
+        return summary, messages, narrative
 
-        response = self.model([
-            {"role": "system", "content": "You are a helpful nutrition assistant."},
-            {"role": "user", "content": prompt},
-        ])
-
-        # If it's a ChatMessage object, grab the content
-        if hasattr(response, "content"):
-            return summary + response.content
-        elif isinstance(response, dict) and "content" in response:
-            return summary + response["content"]
-        elif isinstance(response, str):
-            return summary + response
-        else:
-            return summary + str(response)
+    def forward(self, user: str) -> str:
+        if self.on_chunk is not None:
+            chunks = []
+            for chunk in self.stream(user):
+                self.on_chunk(chunk)
+                chunks.append(chunk)
+            return "".join(chunks)
+
+        summary, messages, narrative = self._prepare(user)
+        if narrative is not None:
+            return summary + narrative
+        if messages is None:
+            return summary
+
+        return summary + response_text(self.model(messages))
+
+    def stream(self, user: str):
+        """
+        Yield the trend analysis incrementally: the statistics summary first,
+        then the narrative as the model streams it.
+        """
+        summary, messages, narrative = self._prepare(user)
+        yield summary
+        if narrative is not None:
+            yield narrative
+            return
+        if messages is None:
+            return
+
+        try:
+            deltas = iter(self.model.generate_stream(messages))
+            first = next(deltas, None)
+        except (AttributeError, NotImplementedError):
+            # Model cannot stream; fall back to a single completion.
+            response = self.model(messages)
+            yield response_text(response)
+            return
+        if first is not None and first.content:
+            yield first.content
+        for delta in deltas:
+            if delta.content:
+                yield delta.content
 
 # -----------------------------
 # 4. Deficit Calculator
@@ -338,42 +517,8 @@ class DeficitCalculator(Tool):
 
         name, age, weight, height, gender = user_info
 
-        # --- Personalized guideline estimation ---
-        # Basal Metabolic Rate (Mifflin-St Jeor Equation)
-        if gender.lower() == "male":
-            bmr = 10 * weight + 6.25 * height - 5 * age + 5
-        else:
-            bmr = 10 * weight + 6.25 * height - 5 * age - 161
-
-        # Assume sedentary activity factor (1.2)
-        calories_target = round(bmr * 1.2)
-
-        # Protein target (0.8 g per kg body weight)
-        protein_target = round(weight * 0.8)
-
-        # Carb target (45–65% calories → use ~55%)
-        carbs_target = round((calories_target * 0.55) / 4)
-
-        # Fat target (25–35% calories → use ~30%)
-        fat_target = round((calories_target * 0.3) / 9)
-
-        guidelines = {
-            "calories": calories_target,
-            "protein": protein_target,
-            "carbs": carbs_target,
-            "fat": fat_target,
-        }
-
-        # --- Compare actual totals vs targets ---
-        analysis = {}
-        for k, target in guidelines.items():
-            actual = float(totals.get(k, 0))
-            if actual < target * 0.9:
-                analysis[k] = f"Deficit: {actual:.1f} vs {target}"
-            elif actual > target * 1.1:
-                analysis[k] = f"Surplus: {actual:.1f} vs {target}"
-            else:
-                analysis[k] = f"Balanced: {actual:.1f} vs {target}"
+        guidelines = compute_guidelines(age, weight, height, gender)
+        analysis = analyze_totals(totals, guidelines)
 
         # --- Save into user file ---
         filepath = os.path.join(DATA_DIR, f"{name.lower()}.json")
@@ -429,19 +574,40 @@ class ReportGenerator(Tool):
     }
     output_type: str = "string"
 
+    TITLES: dict = {
+        "totals": "Daily Totals: ",
+        "deficits": "Deficits/Surpluses:\n",
+        "trends": "Long-Term Trends:\n",
+        "errors": "Errors:\n",
+    }
+
+    @classmethod
+    def section(cls, kind: str, value) -> str | None:
+        """Format one report section ("user_info", "totals", "deficits", "trends", "errors"), or None if empty."""
+        if kind == "user_info":
+            if value and isinstance(value, (list, tuple)) and len(value) == 5:
+                name, age, weight, height, gender = value
+                return f"User Info: Name: {name}, Age: {age}, Weight: {weight} kg, Height: {height} cm, Gender: {gender}"
+            return None
+        return f"{cls.TITLES[kind]}{value}" if value else None
+
+    def iter_sections(self, user_info, totals, deficits, trends, errors=None):
+        """
+        Yield the report one section at a time, in order. Any argument may be a
+        zero-argument callable; it is only called when its section is reached,
+        so each section can be emitted as soon as its data has been computed.
+        """
+        yield "--- Nutrition Report ---"
+        for kind, value in [
+            ("user_info", user_info),
+            ("totals", totals),
+            ("deficits", deficits),
+            ("trends", trends),
+            ("errors", errors),
+        ]:
+            text = self.section(kind, value() if callable(value) else value)
+            if text:
+                yield text
+
     def forward(self, user_info, totals, deficits, trends, errors=None) -> str:
-        report = ["--- Nutrition Report ---"]
-
-        if user_info and isinstance(user_info, (list, tuple)) and len(user_info) == 5:
-            name, age, weight, height, gender = user_info
-            user_info_str = f"Name: {name}, Age: {age}, Weight: {weight} kg, Height: {height} cm, Gender: {gender}"
-            report.append(f"User Info: {user_info_str}")
-        if totals:
-            report.append(f"Daily Totals: {totals}")
-        if deficits:
-            report.append(f"Deficits/Surpluses:\n{deficits}")
-        if trends:
-            report.append(f"Long-Term Trends:\n{trends}")
-        if errors:
-            report.append(f"Errors:\n{errors}")
-        return "\n".join(report)
+        return "\n".join(self.iter_sections(user_info, totals, deficits, trends, errors))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Predictive warming of the Nutritionix lookup cache.
+
+Users mostly eat the same things, so each user's most frequently logged foods
+(from the FoodFrequencyIndex) are fetched into tools.NUTRITION_CACHE ahead of
+time: in the background when a returning user starts a session, or for every
+user on a schedule in a long-running process such as a ShardedDispatcher worker.
+The first lookups of the day are then cache hits.
+
+Warming only does anything when the cache is enabled (NUTRITIONIX_CACHE_TTL > 0).
+NUTRITION_WARM_TOP_N sets how many foods are warmed per user (default 10).
+"""
+import os
+import threading
+
+import tools
+from nutrition_cache import FoodFrequencyIndex
+
+WARM_TOP_N = int(os.getenv("NUTRITION_WARM_TOP_N", "10"))
+
+
+def warm_user(name: str, top_n: int = None, lookup=None) -> int:
+    """Fetch `name`'s top-N foods into the lookup cache; returns how many were fetched."""
+    if not tools.NUTRITION_CACHE.enabled:
+        return 0
+    lookup = lookup or tools.NutritionLookup()
+    foods = FoodFrequencyIndex.shared(tools.DATA_DIR).top(name, top_n or WARM_TOP_N)
+    return lookup.prefetch(foods) if foods else 0
+
+
+def warm_in_background(name: str, top_n: int = None, lookup=None) -> threading.Thread:
+    """Start `warm_user` on a daemon thread and return the thread."""
+    thread = threading.Thread(target=warm_user, args=(name, top_n, lookup), name=f"warm-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_all(top_n: int = None, lookup=None, include=None) -> dict:
+    """
+    Warm every user with a file in tools.DATA_DIR (or those for which
+    `include(name)` is true). Returns {user: foods fetched}.
+    """
+    if not tools.NUTRITION_CACHE.enabled:
+        return {}
+    lookup = lookup or tools.NutritionLookup()
+    warmed = {}
+    with os.scandir(tools.DATA_DIR) as entries:
+        users = sorted(e.name[:-len(".json")] for e in entries if e.name.endswith(".json") and e.is_file())
+    for user in users:
+        if include is None or include(user):
+            warmed[user] = warm_user(user, top_n, lookup)
+    return warmed
+
+
+def schedule_warming(interval: float, top_n: int = None, lookup=None, include=None):
+    """
+    Run `warm_all` now and then every `interval` seconds on a daemon thread.
+    Returns (thread, stop_event); set the event to stop the schedule.
+    """
+    stop = threading.Event()
+
+    def loop():
+        while True:
+            warm_all(top_n, lookup, include)
+            if stop.wait(interval):
+                return
+
+    thread = threading.Thread(target=loop, name="warm-schedule", daemon=True)
+    thread.start()
+    return thread, stop
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+A user-sharded pool of worker processes for the HW2 agent.
+
+The tools read-modify-write one JSON file per user, which is only safe with a
+single writer per user. ShardedDispatcher hashes each user name to one of a
+fixed set of worker processes, so all work for a user runs in order on the
+same worker while different users proceed in parallel. Each worker builds its
+own warm context once at startup (by default the agent module's model, tools
+and agent, including any LLM cache) and reuses it for every job.
+
+    with ShardedDispatcher(workers=4) as pool:
+        answer = pool.run("Kevin", "User: Kevin. Date: ... Food eaten: pizza.").result()
+        print(pool.metrics())
+
+Jobs are `task(context, *args, **kwargs)` calls: `task` and its arguments must
+be picklable (i.e. module-level functions), as must the return value.
+"""
+import hashlib
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = None
+
+# (worker index, worker count) inside a worker process; None in the parent.
+CURRENT_SHARD = None
+
+
+def shard_of(user: str, workers: int) -> int:
+    """Stable worker index for `user`: the same name always maps to the same worker."""
+    digest = hashlib.sha1(user.strip().lower().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % workers
+
+
+def share_rate_limit(count: int):
+    """
+    Give this process 1/`count` of the Nutritionix rate and burst, so `count`
+    worker processes together stay within the quota a single process would use.
+    """
+    import tools
+    from ratelimit import TokenBucket
+
+    limiter = tools.NUTRITIONIX_LIMITER
+    tools.NUTRITIONIX_LIMITER = TokenBucket(rate=limiter.rate / count, capacity=max(1.0, limiter.capacity / count))
+
+
+def agent_context():
+    """
+    Default worker initializer: import the agent module, building its model, tools
+    and agent, and take this worker's share of the Nutritionix rate limit. If
+    NUTRITION_WARM_INTERVAL (seconds) is set, the worker also keeps the lookup
+    cache warm for the users in its shard on that schedule.
+    """
+    import agent
+
+    if CURRENT_SHARD is not None:
+        share_rate_limit(CURRENT_SHARD[1])
+
+    interval = os.getenv("NUTRITION_WARM_INTERVAL")
+    if interval and CURRENT_SHARD is not None:
+        from warming import schedule_warming
+
+        index, count = CURRENT_SHARD
+        schedule_warming(float(interval), lookup=agent.nutrition_tool,
+                         include=lambda user: shard_of(user, count) == index)
+    return {"model": agent.model, "tools": agent.tools, "agent": agent.agent}
+
+
+def run_query(context, query, **kwargs):
+    """Default job: run `query` on the worker's agent."""
+    return context["agent"].run(query, **kwargs)
+
+
+def _picklable(error):
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _worker_main(index, count, jobs, results, abort, init, init_args):
+    global CURRENT_SHARD
+    CURRENT_SHARD = (index, count)
+    # Ctrl-C goes to the whole process group; the parent decides whether to drain.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        context = init(*init_args) if init else None
+    except BaseException as e:
+        results.put(("init_error", index, _picklable(e)))
+        return
+    results.put(("ready", index, None))
+    while True:
+        job = jobs.get()
+        if job is _STOP:
+            break
+        job_id, task, args, kwargs = job
+        if abort.is_set():
+            results.put(("cancelled", job_id, None))
+            continue
+        try:
+            results.put(("ok", job_id, task(context, *args, **kwargs)))
+        except BaseException as e:
+            results.put(("error", job_id, _picklable(e)))
+
+
+class ShardedDispatcher:
+    """
+    Dispatch per-user jobs to `workers` processes, one shard of users each.
+
+    Args:
+        workers: Number of worker processes (fixed for the dispatcher's lifetime).
+        init: Module-level callable run once in each worker; its return value is
+            the `context` passed to every job. Defaults to `agent_context`.
+        init_args: Arguments for `init`.
+        start_method: multiprocessing start method (platform default if None).
+        ready_timeout: Seconds to wait for every worker to finish `init`.
+    """
+
+    def __init__(self, workers=4, init=agent_context, init_args=(), start_method=None, ready_timeout=120):
+        if workers < 1:
+            raise ValueError("`workers` must be at least 1.")
+        ctx = mp.get_context(start_method)
+        self.workers = workers
+        self._results = ctx.Queue()
+        self._abort = ctx.Event()
+        self._jobs = [ctx.Queue() for _ in range(workers)]
+        self._processes = [
+            ctx.Process(target=_worker_main, name=f"nutrition-worker-{i}", daemon=True,
+                        args=(i, workers, self._jobs[i], self._results, self._abort, init, init_args))
+            for i in range(workers)
+        ]
+        self._lock = threading.Lock()
+        self._futures = {}          # job id -> (worker, Future)
+        self._next_id = 0
+        self._closed = False
+        self._stats = [{"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "max_queue_depth": 0}
+                       for _ in range(workers)]
+        self._depth = [0] * workers
+
+        for process in self._processes:
+            process.start()
+        self._await_ready(ready_timeout)
+        self._listener = threading.Thread(target=self._listen, name="nutrition-dispatcher", daemon=True)
+        self._listener.start()
+
+    def _await_ready(self, timeout):
+        deadline = time.monotonic() + timeout
+        ready = 0
+        while ready < self.workers:
+            try:
+                kind, index, payload = self._results.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                self._terminate()
+                raise TimeoutError(f"Workers not ready after {timeout}s.")
+            if kind == "init_error":
+                self._terminate()
+                raise RuntimeError(f"Worker {index} failed to initialize: {payload!r}") from payload
+            ready += 1
+
+    # -----------------------------
+    # Submitting
+    # -----------------------------
+    def shard_of(self, user: str) -> int:
+        return shard_of(user, self.workers)
+
+    def submit(self, user: str, task, *args, **kwargs) -> Future:
+        """Queue `task(context, *args, **kwargs)` on `user`'s worker; returns a Future for its result."""
+        if not isinstance(user, str) or not user.strip():
+            raise ValueError("`user` must be a non-empty string.")
+        worker = self.shard_of(user)
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Dispatcher is shut down.")
+            job_id = self._next_id
+            self._next_id += 1
+            self._futures[job_id] = (worker, future)
+            self._depth[worker] += 1
+            stats = self._stats[worker]
+            stats["submitted"] += 1
+            stats["max_queue_depth"] = max(stats["max_queue_depth"], self._depth[worker])
+            # Enqueue under the lock so jobs for a user reach its worker in submission order.
+            self._jobs[worker].put((job_id, task, args, kwargs))
+        return future
+
+    def run(self, user: str, query: str, **kwargs) -> Future:
+        """Run an agent query for `user` on its worker."""
+        return self.submit(user, run_query, query, **kwargs)
+
+    # -----------------------------
+    # Results
+    # -----------------------------
+    def _listen(self):
+        suspects = set()
+        while True:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                # A worker that has exited has nothing left in the pipe once a full
+                # timeout passes without messages; only then are its jobs failed.
+                dead = {i for i, p in enumerate(self._processes) if not p.is_alive()}
+                if not self._closed:
+                    self._fail_jobs(dead & suspects)
+                suspects = dead
+                continue
+            if message is _STOP:
+                return
+            kind, job_id, payload = message
+            with self._lock:
+                worker, future = self._futures.pop(job_id, (None, None))
+                if future is None:
+                    continue
+                self._depth[worker] -= 1
+                self._stats[worker][{"ok": "completed", "error": "failed", "cancelled": "cancelled"}[kind]] += 1
+            if future.cancelled():
+                continue  # cancelled by the caller while queued; the result is dropped
+            if kind == "ok":
+                future.set_result(payload)
+            elif kind == "error":
+                future.set_exception(payload)
+            else:
+                future.cancel()
+
+    def _fail_jobs(self, workers):
+        """Fail the outstanding jobs of exited `workers`."""
+        if not workers:
+            return
+        with self._lock:
+            lost = [(job_id, worker, future) for job_id, (worker, future) in self._futures.items() if worker in workers]
+            for job_id, worker, _ in lost:
+                del self._futures[job_id]
+                self._depth[worker] -= 1
+                self._stats[worker]["failed"] += 1
+        for _, worker, future in lost:
+            if not future.cancelled():
+                future.set_exception(RuntimeError(f"Worker {worker} exited with code {self._processes[worker].exitcode}."))
+
+    def metrics(self) -> list[dict]:
+        """Per-worker queue depth (jobs submitted but not finished) and job counts."""
+        with self._lock:
+            return [
+                {
+                    "worker": i,
+                    "pid": process.pid,
+                    "alive": process.is_alive(),
+                    "queue_depth": self._depth[i],
+                    **self._stats[i],
+                }
+                for i, process in enumerate(self._processes)
+            ]
+
+    # -----------------------------
+    # Shutdown
+    # -----------------------------
+    def shutdown(self, drain=True, timeout=None):
+        """
+        Stop accepting jobs and stop the workers.
+
+        With `drain=True` every job already queued runs to completion first. With
+        `drain=False` queued jobs that have not started are cancelled; jobs already
+        running still finish. Workers still alive after `timeout` seconds are
+        terminated and their outstanding jobs fail.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if not drain:
+            self._abort.set()
+        for jobs in self._jobs:
+            jobs.put(_STOP)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for process in self._processes:
+            process.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        self._terminate()
+        # Every result a worker sent is in the pipe before it exits, so the
+        # listener has delivered all of them once it reaches this marker.
+        self._results.put(_STOP)
+        self._listener.join()
+        self._fail_jobs(set(range(self.workers)))
+
+    def _terminate(self):
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(drain=True)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/conftest.py
+# Fixtures shared by the offline tests.
+import json
+import pytest
+from smolagents import CodeAgent, LogLevel
+
+import tools
+from fakes import FakeNutritionix, ScriptedModel
+
+PROFILE = {"age": 30, "weight": 70.0, "height": 175.0, "gender": "male"}  # targets: 2004 kcal, 56 g protein
+
+
+@pytest.fixture
+def nutritionix_credentials(monkeypatch):
+    """Dummy Nutritionix credentials, so NutritionLookup can be built without real keys."""
+    monkeypatch.setenv("NUTRITIONIX_APP_ID", "test")
+    monkeypatch.setenv("NUTRITIONIX_API_KEY", "test")
+
+
+@pytest.fixture
+def offline_tools(tmp_path, monkeypatch, nutritionix_credentials):
+    """Point the tools at `tmp_path` and a FakeNutritionix server; yields the server."""
+    monkeypatch.setattr(tools, "DATA_DIR", str(tmp_path))
+    with FakeNutritionix() as server:
+        monkeypatch.setattr(tools, "NUTRITIONIX_URL", server.url)
+        yield server
+
+
+@pytest.fixture
+def make_agent():
+    """Factory for a CodeAgent over the nutrition tools, driven by ScriptedModel(steps, **model_kwargs)."""
+    def make(steps, **model_kwargs):
+        model = ScriptedModel(steps=steps, **model_kwargs)
+        agent_tools = [
+            tools.NutritionLookup(),
+            tools.DeficitCalculator(),
+            tools.UserTrends(model=model),
+            tools.ReportGenerator(),
+        ]
+        return CodeAgent(tools=agent_tools, model=model, verbosity_level=LogLevel.OFF, max_steps=5)
+    return make
+
+
+@pytest.fixture
+def write_user():
+    """
+    Writer of a user file: write_user(data_dir, name, days, profile=PROFILE), where
+    `days` is a list of (date, calories, protein) tuples. Returns the history.
+    """
+    def write(data_dir, name, days, profile=PROFILE):
+        history = [
+            {
+                "date": d,
+                "foods": ["rice", "beans"],
+                "totals": {"calories": cal, "protein": protein, "carbs": 275, "fat": 67},
+                "analysis": {"protein": f"Deficit: {protein:.1f} vs 56"},
+            }
+            for d, cal, protein in days
+        ]
+        with open(data_dir / f"{name}.json", "w") as f:
+            json.dump({"name": name.capitalize(), **profile, "history": history}, f)
+        return history
+    return write
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/test_benchmarks.py
+import json
+import requests
+from collections import Counter
+
+import tools
+from fakes import FakeNutritionix, fake_nutrients
+import bench_hw2
+import compare
+import load_hw2
+
+
+# ------------------------------------------
+# 1. FakeNutritionix
+# ------------------------------------------
+def test_fake_nutritionix_is_deterministic_and_counts_requests():
+    with FakeNutritionix(unknown=["battery acid"]) as server:
+        ok = requests.post(server.url, json={"query": "apple, 2 eggs"})
+        missing = requests.post(server.url, json={"query": "battery acid"})
+
+        assert ok.status_code == 200
+        assert ok.json()["foods"] == [fake_nutrients("apple"), fake_nutrients("2 eggs")]
+        assert missing.status_code == 404
+        assert server.request_count == 2
+
+
+# ------------------------------------------
+# 2. bench_hw2 smoke run
+# ------------------------------------------
+def test_bench_hw2_writes_results(tmp_path, monkeypatch):
+    # The benchmark repoints module globals and env vars; restore them afterwards.
+    monkeypatch.setattr(tools, "DATA_DIR", tools.DATA_DIR)
+    monkeypatch.setattr(tools, "NUTRITIONIX_URL", tools.NUTRITIONIX_URL)
+    monkeypatch.setattr(tools.NUTRITIONIX_LIMITER, "rate", tools.NUTRITIONIX_LIMITER.rate)
+    for var in ["GEMINI_API_KEY", "NUTRITIONIX_APP_ID", "NUTRITIONIX_API_KEY", "NUTRITIONIX_URL"]:
+        monkeypatch.setenv(var, os.getenv(var, "test"))
+
+    output = tmp_path / "hw2.json"
+    bench_hw2.main([
+        "--output", str(output), "--iterations", "2",
+        "--history", "3", "--foods", "2", "--concurrency", "2", "--no-memory",
+    ])
+
+    with open(output) as f:
+        payload = json.load(f)
+    run = payload["results"]["agent.run[history=3,foods=2,concurrency=2]"]
+    assert run["iterations"] == 4
+    assert run["errors"] == 0
+    assert {"p50", "p90", "p99"} <= set(run["latency_ms"])
+    assert payload["fake_nutritionix"]["requests"] > 0
+
+
+# ------------------------------------------
+# 3. compare
+# ------------------------------------------
+def test_compare_flags_regressions():
+    def result(p50, ops):
+        return {"latency_ms": {"p50": p50, "p99": p50}, "throughput_per_s": ops}
+
+    baseline = {"results": {"fast": result(10, 100), "slow": result(10, 100)}}
+    current = {"results": {"fast": result(10.5, 98), "slow": result(20, 50)}}
+
+    rows, regressed = compare.compare(baseline, current, threshold=0.15)
+
+    assert regressed
+    assert {r[0] for r in rows if r[-1]} == {"slow"}
+
+
+# ------------------------------------------
+# 4. load_hw2
+# ------------------------------------------
+def test_load_run_reports_ops_and_intact_files(monkeypatch):
+    monkeypatch.setattr(tools, "DATA_DIR", tools.DATA_DIR)
+    monkeypatch.setattr(tools, "NUTRITIONIX_URL", tools.NUTRITIONIX_URL)
+    monkeypatch.setattr(tools.NUTRITIONIX_LIMITER, "rate", tools.NUTRITIONIX_LIMITER.rate)
+    for var in ["NUTRITIONIX_APP_ID", "NUTRITIONIX_API_KEY", "NUTRITIONIX_URL"]:
+        monkeypatch.setenv(var, os.getenv(var, "test"))
+
+    summary = load_hw2.main(["--users", "8", "--ops", "4", "--latency", "0", "--jitter", "0", "--rate", "0"])
+
+    assert summary["total_ops"] == 32
+    assert summary["errors"] == {}
+    assert summary["integrity_problems"] == []
+
+
+def test_sharded_load_keeps_shared_accounts_intact(monkeypatch):
+    monkeypatch.setattr(tools, "DATA_DIR", tools.DATA_DIR)
+    monkeypatch.setattr(tools, "NUTRITIONIX_URL", tools.NUTRITIONIX_URL)
+    for var in ["NUTRITIONIX_APP_ID", "NUTRITIONIX_API_KEY", "NUTRITIONIX_URL"]:
+        monkeypatch.setenv(var, os.getenv(var, "test"))
+
+    # Eight simulated users share two accounts; each account has a single writer.
+    summary = load_hw2.main(["--users", "8", "--accounts", "2", "--ops", "4", "--mode", "sharded",
+                             "--workers", "2", "--latency", "0", "--jitter", "0", "--rate", "0"])
+
+    assert summary["total_ops"] == 32
+    assert summary["errors"] == {}
+    assert summary["integrity_problems"] == []
+    assert sum(m["completed"] for m in summary["workers"]) == 32
+
+
+def test_check_integrity_detects_lost_foods(tmp_path):
+    with open(tmp_path / "eve.json", "w") as f:
+        json.dump({"name": "eve", "history": [
+            {"date": "2025-09-20", "foods": ["apple"], "totals": {}, "analysis": {"calories": "Deficit"}},
+        ]}, f)
+
+    expected = {"eve": Counter(["apple", "banana"])}
+    problems = load_hw2.check_integrity(tmp_path, expected, "2025-09-20")
+
+    assert problems == ["eve: 1 logged food(s) lost: {'banana': 1}"]
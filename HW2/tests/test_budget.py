@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/test_budget.py
+from budget import BudgetedAgent, RunBudget, budget_metrics, reset_budget_metrics
+from fakes import code_step
+
+USER_INFO = ["Frank", 35, 82.0, 180.0, "male"]
+
+STEPS = [
+    code_step("lookup = nutrition_lookup(food=['apple', 'rice'], name='Frank', log_date='2025-09-20')\nprint(lookup)"),
+    code_step(f"deficits = deficit_calculator(totals=lookup['totals'], user_info={USER_INFO!r}, log_date='2025-09-20')\n"
+              "trends = user_trends(user='Frank')\n"
+              f"final_answer(report_generator(user_info={USER_INFO!r}, totals=lookup['totals'], "
+              "deficits=str(deficits), trends=trends))"),
+]
+
+
+# ------------------------------------------
+# 1. Within budget
+# ------------------------------------------
+def test_run_within_budget_returns_agent_answer(offline_tools, make_agent):
+    reset_budget_metrics()
+    runner = BudgetedAgent(make_agent(STEPS), RunBudget(max_tokens=100_000, max_tool_calls=10))
+
+    answer = runner.run("Log Frank's lunch.")
+
+    assert "--- Nutrition Report ---" in answer
+    assert "Run stopped early" not in answer
+    assert budget_metrics()["runs"] == 1
+    assert budget_metrics()["tripped"] == 0
+
+
+# ------------------------------------------
+# 2. Tool-call budget
+# ------------------------------------------
+def test_tool_call_budget_degrades_to_partial_report(offline_tools, make_agent):
+    reset_budget_metrics()
+    runner = BudgetedAgent(make_agent(STEPS), RunBudget(max_tool_calls=2))
+
+    answer = runner.run("Log Frank's lunch.")
+
+    assert "Daily Totals:" in answer
+    assert "Deficits/Surpluses:" in answer
+    assert "Name: Frank" in answer
+    assert "tool_calls budget exceeded" in answer
+    assert runner.agent.model.model.calls == 2  # the trip stops the run instead of becoming an observation
+    assert budget_metrics()["by_limit"] == {"tool_calls": 1}
+
+
+# ------------------------------------------
+# 3. Token budget
+# ------------------------------------------
+def test_token_budget_stops_before_next_llm_call(offline_tools, make_agent):
+    reset_budget_metrics()
+    agent = make_agent(STEPS)
+    runner = BudgetedAgent(agent, RunBudget(max_tokens=1))
+
+    answer = runner.run("Log Frank's lunch.", user_info=USER_INFO)
+
+    # The first completion is charged, the second step is never generated.
+    assert agent.model.model.calls == 1
+    assert "Daily Totals:" in answer
+    assert "Name: Frank" in answer
+    assert "tokens budget exceeded" in answer
+    assert budget_metrics()["trip_rate"] == 1.0
+
+
+# ------------------------------------------
+# 4. Wall-clock budget
+# ------------------------------------------
+def test_wall_clock_budget_stops_at_next_call(offline_tools, make_agent):
+    reset_budget_metrics()
+    agent = make_agent(STEPS, latency=0.3)
+    runner = BudgetedAgent(agent, RunBudget(max_seconds=0.45))
+
+    answer = runner.run("Log Frank's lunch.", user_info=USER_INFO)
+
+    # The lookup fits in the first 0.45s; the deficit calculation after the slow second step does not.
+    assert agent.model.model.calls == 2
+    assert "Daily Totals:" in answer
+    assert "Deficits/Surpluses:" not in answer
+    assert "wall_clock budget exceeded" in answer
+    assert budget_metrics()["by_limit"] == {"wall_clock": 1}
+
+
+# ------------------------------------------
+# 5. Configuration
+# ------------------------------------------
+def test_run_budget_from_env(monkeypatch):
+    monkeypatch.setenv("NUTRITION_MAX_TOKENS", "5000")
+    monkeypatch.setenv("NUTRITION_MAX_SECONDS", "12.5")
+    monkeypatch.delenv("NUTRITION_MAX_TOOL_CALLS", raising=False)
+
+    budget = RunBudget.from_env()
+
+    assert (budget.max_tokens, budget.max_seconds, budget.max_tool_calls) == (5000, 12.5, None)
+    assert not budget.is_unlimited()
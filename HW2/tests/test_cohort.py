@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# tests/test_cohort.py
+import pytest
+
+from cohort import calorie_trend, format_tables, main, scan
+
+@pytest.fixture
+def cohort_dir(tmp_path, write_user):
+    write_user(tmp_path, "ann", [("2025-09-15", 2000, 30), ("2025-09-16", 2000, 35)])         # protein deficit
+    write_user(tmp_path, "ben", [("2025-09-15", 1500, 60), ("2025-09-20", 2500, 60)])         # calories rising
+    write_user(tmp_path, "cat", [("2025-08-01", 2000, 56)])                                   # outside last week
+    write_user(tmp_path, "dan", [("2025-09-18", 2000, 56)], profile={})                       # no profile
+    (tmp_path / "broken.json").write_text("{not json")
+    (tmp_path / "notes.txt").write_text("ignored")
+    return tmp_path
+
+
+# ------------------------------------------
+# 1. Aggregates
+# ------------------------------------------
+def test_scan_counts_users_by_status(cohort_dir):
+    agg = scan(str(cohort_dir), since="2025-09-14", until="2025-09-20", workers=0)
+
+    assert agg["files"] == 5
+    assert agg["users"] == 3
+    assert agg["inactive"] == 1
+    assert agg["unprofiled"] == 1
+    assert agg["errors"] == 1
+    assert agg["days"] == 5
+    assert agg["status"]["protein"]["Deficit"] == 1
+    assert agg["status"]["protein"]["Balanced"] == 1
+    assert agg["deficit_days"]["protein"] == 2
+    assert agg["trend"] == {"stable": 1, "rising": 1}
+
+
+def test_malformed_totals_count_only_as_an_error(cohort_dir):
+    before = scan(str(cohort_dir), since="2025-09-14", until="2025-09-20", workers=0)
+    (cohort_dir / "eve.json").write_text(
+        '{"name": "Eve", "age": 30, "weight": 60.0, "height": 165.0, "gender": "female", "history": ['
+        '{"date": "2025-09-15", "totals": {"calories": 1800, "protein": 50, "carbs": 200, "fat": 60}},'
+        '{"date": "2025-09-16", "totals": {"calories": "lots", "protein": 50, "carbs": 200, "fat": 60}}]}'
+    )
+
+    agg = scan(str(cohort_dir), since="2025-09-14", until="2025-09-20", workers=0)
+
+    assert (agg["files"], agg["errors"]) == (before["files"] + 1, before["errors"] + 1)
+    for key in ["users", "inactive", "unprofiled", "days", "status", "deficit_days", "trend", "intake_sum"]:
+        assert agg[key] == before[key]
+
+
+def test_process_pool_matches_inline_scan(cohort_dir, write_user):
+    for i in range(20):
+        write_user(cohort_dir, f"extra{i}", [("2025-09-15", 1800 + i, 50), ("2025-09-16", 1900, 50)])
+
+    inline = scan(str(cohort_dir), workers=0)
+    pooled = scan(str(cohort_dir), workers=2, chunk_size=3)
+
+    for key in ["files", "users", "days", "errors", "status", "deficit_days", "trend", "intake_sum"]:
+        assert pooled[key] == inline[key]
+    assert pooled["throughput"]["workers"] == 2
+    assert pooled["throughput"]["files_per_sec"] > 0
+
+
+def test_calorie_trend():
+    days = lambda *cals: [{"totals": {"calories": c}} for c in cals]
+    assert calorie_trend(days(2000, 2010, 1995)) == "stable"
+    assert calorie_trend(days(1500, 1800, 2100)) == "rising"
+    assert calorie_trend(days(2100, 1800, 1500)) == "falling"
+
+
+# ------------------------------------------
+# 2. CLI
+# ------------------------------------------
+def test_main_last_days_window(cohort_dir, capsys):
+    agg = main(["--data-dir", str(cohort_dir), "--days", "7", "--until", "2025-09-20", "--workers", "0"])
+
+    assert agg["window"] == {"since": "2025-09-14", "until": "2025-09-20"}
+    out = capsys.readouterr().out
+    assert out == format_tables(agg) + "\n"
+    assert "| Protein | 1 (50%) | 1 (50%) | 0 (0%) | 2 |" in out
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# tests/test_columnar.py
+import json
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from tools import trend_stats
+from cohort import scan
+from columnar import ColumnarStore, bucket_of, export
+
+@pytest.fixture
+def dirs(tmp_path, write_user):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    write_user(data_dir, "ann", [("2025-09-15", 2000, 30), ("2025-09-16", 2100, 35), ("2025-09-20", 1900, 40)])
+    write_user(data_dir, "ben", [("2025-09-15", 1500, 60), ("2025-09-20", 2500, 60)])
+    write_user(data_dir, "dan", [("2025-09-18", 2000, 56)], profile={})
+    return data_dir, tmp_path / "store"
+
+
+# ------------------------------------------
+# 1. Export
+# ------------------------------------------
+def test_export_flattens_histories(dirs):
+    data_dir, store_dir = dirs
+
+    result = export(str(data_dir), str(store_dir), buckets=4)
+    table = ColumnarStore(str(store_dir)).table(users=["Ann"])
+
+    assert result["added"] == 3
+    assert table.num_rows == 3
+    row = table.to_pylist()[0]
+    assert row["user"] == "ann" and row["name"] == "Ann"
+    assert row["foods"] == ["rice", "beans"]
+    assert row["protein_status"] == "Deficit" and row["protein_target"] == 56.0
+    assert row["calories_status"] is None
+
+
+def test_incremental_export_rewrites_only_changed_buckets(dirs, write_user):
+    data_dir, store_dir = dirs
+    export(str(data_dir), str(store_dir), buckets=4)
+
+    assert export(str(data_dir), str(store_dir), buckets=4)["buckets_written"] == []
+
+    write_user(data_dir, "ben", [("2025-09-15", 1500, 60), ("2025-09-20", 2500, 60), ("2025-09-21", 2400, 70)])
+    os.remove(data_dir / "dan.json")
+    result = export(str(data_dir), str(store_dir), buckets=4)
+
+    assert result["updated"] == 1 and result["removed"] == 1
+    assert result["buckets_written"] == sorted({bucket_of("ben", 4), bucket_of("dan", 4)})
+    store = ColumnarStore(str(store_dir))
+    assert store.table(users=["ben"]).num_rows == 3
+    assert store.table(users=["dan"]).num_rows == 0
+    assert store.table().num_rows == 6
+
+
+# ------------------------------------------
+# 2. Queries
+# ------------------------------------------
+def test_user_stats_match_trend_stats(dirs):
+    data_dir, store_dir = dirs
+    export(str(data_dir), str(store_dir), buckets=4)
+    with open(data_dir / "ann.json") as f:
+        history = json.load(f)["history"]
+
+    stats = ColumnarStore(str(store_dir)).user_stats("ann", since="2025-09-16")
+
+    assert stats.pop("days") == 2
+    expected = trend_stats(history[1:])
+    for k, values in expected.items():
+        assert stats[k] == pytest.approx(values)
+
+
+def test_cohort_status_matches_json_scan(dirs):
+    data_dir, store_dir = dirs
+    export(str(data_dir), str(store_dir), buckets=4)
+
+    columnar = ColumnarStore(str(store_dir)).cohort_status(until="2025-09-18")
+    scanned = scan(str(data_dir), until="2025-09-18", workers=0)
+
+    assert columnar["users"] == scanned["users"] == 3
+    assert columnar["unprofiled"] == scanned["unprofiled"] == 1
+    for k, counts in columnar["status"].items():
+        assert counts == {s: scanned["status"][k][s] for s in counts}
+
+
+def test_reader_requires_export(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ColumnarStore(str(tmp_path))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+
+# tests/test_llm_cache.py
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tools
+from llm_cache import CachedModel, CacheMiss
+from fakes import ScriptedModel
+
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful nutrition assistant."},
+    {"role": "user", "content": "Summarize Bob's week."},
+]
+
+
+# ------------------------------------------
+# 1. Hits and misses
+# ------------------------------------------
+def test_identical_requests_are_served_from_disk(tmp_path):
+    inner = ScriptedModel(narrative="Bob is doing well.")
+    model = CachedModel(inner, cache_dir=tmp_path)
+
+    first = model(MESSAGES)
+    second = model(MESSAGES)
+    # A fresh wrapper over the same directory still hits.
+    third = CachedModel(ScriptedModel(narrative="different"), cache_dir=tmp_path)(MESSAGES)
+
+    assert inner.calls == 1
+    assert first.content == second.content == third.content == "Bob is doing well."
+    assert second.token_usage.total_tokens == 0
+    assert model.stats()["hits"] == 1
+
+
+def test_parameters_are_part_of_the_key(tmp_path):
+    inner = ScriptedModel()
+    model = CachedModel(inner, cache_dir=tmp_path)
+
+    model(MESSAGES)
+    model(MESSAGES, temperature=0.2)
+    model(MESSAGES[:1])
+
+    assert inner.calls == 3
+
+
+# ------------------------------------------
+# 2. Modes
+# ------------------------------------------
+def test_record_then_replay(tmp_path):
+    CachedModel(ScriptedModel(narrative="recorded"), cache_dir=tmp_path, mode="record")(MESSAGES)
+
+    replay_inner = ScriptedModel(narrative="live")
+    replay = CachedModel(replay_inner, cache_dir=tmp_path, mode="replay")
+
+    assert replay(MESSAGES).content == "recorded"
+    with pytest.raises(CacheMiss):
+        replay(MESSAGES[:1])
+    assert replay_inner.calls == 0
+
+
+def test_streaming_is_cached(tmp_path):
+    inner = ScriptedModel(narrative="Steady intake over the week.")
+    model = CachedModel(inner, cache_dir=tmp_path)
+
+    live = "".join(d.content for d in model.generate_stream(MESSAGES))
+    cached = "".join(d.content for d in model.generate_stream(MESSAGES))
+
+    assert live == cached == "Steady intake over the week."
+    assert inner.calls == 1
+
+
+# ------------------------------------------
+# 3. Eviction
+# ------------------------------------------
+def test_ttl_expiry(tmp_path):
+    inner = ScriptedModel()
+    model = CachedModel(inner, cache_dir=tmp_path, ttl=0.05)
+
+    model(MESSAGES)
+    time.sleep(0.1)
+    model(MESSAGES)
+
+    assert inner.calls == 2
+
+
+def test_max_entries_evicts_least_recently_used(tmp_path):
+    inner = ScriptedModel()
+    model = CachedModel(inner, cache_dir=tmp_path, max_entries=3)
+
+    requests = [[{"role": "user", "content": f"question {i}"}] for i in range(5)]
+    for i, messages in enumerate(requests):
+        model(messages)
+        if i >= 1:
+            model(requests[0])  # keep the first one hot
+        time.sleep(0.01)
+
+    assert model.stats()["entries"] <= 3
+    calls = inner.calls
+    model(requests[0])
+    assert inner.calls == calls
+
+
+def test_concurrent_hits_and_evictions_do_not_race(tmp_path):
+    inner = ScriptedModel()
+    model = CachedModel(inner, cache_dir=tmp_path, max_entries=4)
+    requests = [[{"role": "user", "content": f"question {i}"}] for i in range(12)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(model, requests * 4))
+
+    stats = model.stats()
+    assert stats["hits"] + stats["misses"] == 48
+    assert stats["entries"] <= 4
+
+
+# ------------------------------------------
+# 4. UserTrends through the cache
+# ------------------------------------------
+def test_user_trends_uses_cached_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(tools, "DATA_DIR", str(tmp_path))
+    with open(tmp_path / "gina.json", "w") as f:
+        json.dump({"name": "Gina", "history": [
+            {"date": "2025-09-14", "totals": {"calories": 1800, "protein": 60, "carbs": 200, "fat": 50}},
+            {"date": "2025-09-15", "totals": {"calories": 1900, "protein": 65, "carbs": 210, "fat": 55}},
+        ]}, f)
+    inner = ScriptedModel(narrative="Gina is consistent.")
+    trends = tools.UserTrends(model=CachedModel(inner, cache_dir=tmp_path / "cache"))
+
+    assert trends.forward("Gina") == trends.forward("Gina")
+    assert inner.calls == 1
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/test_precompute.py
+import pytest
+
+import tools
+from nutrition_cache import PrecomputedStore
+from precompute import precompute_user, run
+from fakes import ScriptedModel, code_step
+
+USER_INFO = ["Frank", 30, 70.0, 175.0, "male"]
+
+STEPS = [
+    code_step("lookup = nutrition_lookup(food=['apple', 'rice'], name='Frank', log_date='2025-09-20')\nprint(lookup)"),
+    code_step(f"deficits = deficit_calculator(totals=lookup['totals'], user_info={USER_INFO!r}, log_date='2025-09-20')\n"
+              "trends = user_trends(user='Frank')\n"
+              f"final_answer(report_generator(user_info={USER_INFO!r}, totals=lookup['totals'], "
+              "deficits=str(deficits), trends=trends))"),
+]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tools, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+# ------------------------------------------
+# 1. Precompute job
+# ------------------------------------------
+def test_precompute_stores_analysis_stats_and_narrative(data_dir, write_user):
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40)])
+
+    assert precompute_user("Lena", ScriptedModel(narrative="Lena is steady.")) == "computed"
+
+    record = PrecomputedStore(str(data_dir)).load("lena")
+    assert record["through"] == "2025-09-11"
+    assert record["guidelines"] == tools.compute_guidelines(30, 70.0, 175.0, "male")
+    assert record["days"]["2025-09-10"] == tools.analyze_totals(
+        {"calories": 1800, "protein": 40, "carbs": 275, "fat": 67}, record["guidelines"])
+    assert record["stats"]["calories"] == {"avg": 2000, "min": 1800, "max": 2200}
+    assert record["summary"].startswith("Over the past 2 days")
+    assert record["narrative"] == "Lena is steady."
+
+
+def test_run_only_recomputes_changed_users(data_dir, write_user):
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40)])
+    write_user(data_dir, "milo", [("2025-09-10", 2500, 60)], profile={})
+    model = ScriptedModel()
+
+    first = run(model, workers=2)
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40), ("2025-09-12", 2100, 40)])
+    second = run(model, workers=2)
+
+    assert (first["computed"], first["fresh"]) == (2, 0)
+    assert (second["computed"], second["fresh"]) == (1, 1)
+    assert model.calls == 2  # milo has a single day, so no narrative is requested
+    assert PrecomputedStore(str(data_dir)).load("milo")["guidelines"] is None
+
+
+def test_run_reports_errors_per_user(data_dir, write_user):
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40)])
+    (data_dir / "broken.json").write_text("{not json")
+
+    result = run(ScriptedModel(), workers=2)
+
+    assert result["computed"] == 1
+    assert list(result["errors"]) == ["broken"]
+
+
+# ------------------------------------------
+# 2. Serving from UserTrends
+# ------------------------------------------
+def test_user_trends_serves_valid_precomputed_narrative(data_dir, write_user):
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40)])
+    precompute_user("lena", ScriptedModel(narrative="Precomputed narrative."))
+    live = ScriptedModel(narrative="Live narrative.")
+    trends = tools.UserTrends(model=live)
+
+    served = trends.forward("Lena")
+    streamed = "".join(trends.stream("Lena"))
+
+    assert served == streamed
+    assert served.endswith("Precomputed narrative.")
+    assert live.calls == 0
+
+
+def test_days_logged_later_keep_the_narrative_and_refresh_the_summary(data_dir, write_user):
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40)])
+    precompute_user("lena", ScriptedModel(narrative="Precomputed narrative."))
+    live = ScriptedModel(narrative="Live narrative.")
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40), ("2025-09-12", 2600, 40)])
+
+    served = tools.UserTrends(model=live).forward("lena")
+
+    assert served.startswith("Over the past 3 days")
+    assert "(range 1800.0–2600.0)" in served
+    assert served.endswith("Precomputed narrative.")
+    assert live.calls == 0
+
+
+def test_edited_days_or_old_versions_are_not_served(data_dir, write_user, monkeypatch):
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 2200, 40)])
+    precompute_user("lena", ScriptedModel(narrative="Precomputed narrative."))
+    live = ScriptedModel(narrative="Live narrative.")
+    trends = tools.UserTrends(model=live)
+
+    write_user(data_dir, "lena", [("2025-09-10", 1800, 40), ("2025-09-11", 1500, 40)])
+    assert trends.forward("lena").endswith("Live narrative.")
+
+    precompute_user("lena", ScriptedModel(narrative="Precomputed narrative."))
+    monkeypatch.setattr("nutrition_cache.PRECOMPUTE_VERSION", 99)
+    assert trends.forward("lena").endswith("Live narrative.")
+    assert live.calls == 2
+
+
+def test_agent_run_uses_precomputed_narrative_after_logging(offline_tools, make_agent, write_user, tmp_path):
+    write_user(tmp_path, "frank", [("2025-09-18", 1800, 40), ("2025-09-19", 2200, 40)])
+    precompute_user("Frank", ScriptedModel(narrative="Frank is precomputed."))
+    agent = make_agent(STEPS)
+
+    answer = agent.run("Log Frank's lunch.")
+
+    assert agent.model.calls == 2  # the two agent steps; no live trends call
+    assert "Over the past 3 days" in answer
+    assert "Frank is precomputed." in answer
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+
+# tests/test_profiling.py
+import json
+import pstats
+import tracemalloc
+
+import tools
+from profiling import Profiler, aggregate, main, profile_from_env
+from fakes import code_step
+
+USER_INFO = ["Kai", 40, 75.0, 178.0, "male"]
+
+STEPS = [
+    code_step("lookup = nutrition_lookup(food=['apple', 'rice'], name='Kai', log_date='2025-09-20')\nprint(lookup)"),
+    code_step(f"deficits = deficit_calculator(totals=lookup['totals'], user_info={USER_INFO!r}, log_date='2025-09-20')\n"
+              "final_answer(str(deficits))"),
+]
+
+
+# ------------------------------------------
+# 1. Enabling
+# ------------------------------------------
+def test_disabled_profiling_leaves_agent_untouched(monkeypatch, offline_tools, make_agent):
+    monkeypatch.delenv("NUTRITION_PROFILE_DIR", raising=False)
+    agent = make_agent(STEPS)
+
+    assert profile_from_env(agent) is agent
+    assert "run" not in agent.__dict__
+    assert "forward" not in agent.tools["nutrition_lookup"].__dict__
+
+
+def test_profiled_run_writes_artifacts(tmp_path, monkeypatch, offline_tools, make_agent):
+    monkeypatch.setenv("NUTRITION_PROFILE_DIR", str(tmp_path / "profiles"))
+    agent = profile_from_env(make_agent(STEPS))
+
+    answer = agent.run("Log Kai's lunch.")
+
+    run_dirs = os.listdir(tmp_path / "profiles")
+    assert "calories" in answer and len(run_dirs) == 1
+    run_dir = tmp_path / "profiles" / run_dirs[0]
+    with open(run_dir / "summary.json") as f:
+        summary = json.load(f)
+    assert summary["label"] == "agent.run: Log Kai's lunch."
+    assert summary["tools"]["nutrition_lookup"]["calls"] == 1
+    assert summary["tools"]["deficit_calculator"]["calls"] == 1
+    assert summary["peak_memory_bytes"] > 0
+    # Tool code runs on smolagents' executor thread and is merged into the run's profile.
+    profiled = pstats.Stats(str(run_dir / "profile.prof")).stats
+    assert {"forward", "_fetch"} <= {name for filename, _, name in profiled if filename == tools.__file__}
+    with open(run_dir / "allocations.json") as f:
+        assert all(a["size_bytes"] > 0 for a in json.load(f))
+
+
+def test_tool_called_outside_a_run_gets_its_own_profile(tmp_path, offline_tools):
+    profiler = Profiler(str(tmp_path / "profiles"), memory=False)
+    tool = profiler.wrap_tool(tools.NutritionLookup())
+
+    tool.forward(["apple"], "Kai", "2025-09-20")
+
+    assert len(profiler.runs) == 1
+    with open(os.path.join(profiler.runs[0], "summary.json")) as f:
+        summary = json.load(f)
+    assert summary["label"] == "tool: nutrition_lookup"
+    assert summary["peak_memory_bytes"] is None
+
+
+def test_tracing_started_elsewhere_is_left_running(tmp_path, offline_tools):
+    tracemalloc.start()
+    try:
+        profiler = Profiler(str(tmp_path / "profiles"))
+        profiler.wrap_tool(tools.NutritionLookup()).forward(["apple"], "Kai", "2025-09-20")
+
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+# ------------------------------------------
+# 2. Report
+# ------------------------------------------
+def test_report_aggregates_runs(tmp_path, offline_tools, make_agent, capsys):
+    profiler = Profiler(str(tmp_path / "profiles"))
+    agent = profiler.wrap_agent(make_agent(STEPS))
+    agent.run("Log Kai's lunch.")
+    agent.run("Log Kai's lunch again.")
+
+    report = aggregate(str(tmp_path / "profiles"), top=5)
+    main(["report", str(tmp_path / "profiles"), "--top", "5"])
+
+    assert report["runs"] == 2
+    assert report["tools"]["nutrition_lookup"]["calls"] == 2
+    assert len(report["functions"]) == 5
+    cumulative = [f["cumulative_seconds"] for f in report["functions"]]
+    assert cumulative == sorted(cumulative, reverse=True)
+    assert all(a["runs"] >= 1 for a in report["allocations"])
+    out = capsys.readouterr().out
+    assert "2 profiled run(s)" in out and "Top allocation sites" in out
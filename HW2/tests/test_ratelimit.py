@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/test_ratelimit.py
+import threading
+import time
+import pytest
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import tools
+from ratelimit import SingleFlight, TokenBucket
+from fakes import FakeNutritionix
+
+
+# ------------------------------------------
+# 1. TokenBucket
+# ------------------------------------------
+def test_token_bucket_allows_burst_then_throttles():
+    bucket = TokenBucket(rate=20, capacity=5)
+
+    start = time.monotonic()
+    for _ in range(5):
+        assert bucket.acquire()
+    burst = time.monotonic() - start
+    for _ in range(4):
+        assert bucket.acquire()
+    throttled = time.monotonic() - start - burst
+
+    assert burst < 0.05
+    assert throttled >= 0.15  # 4 more tokens at 20/s
+
+
+def test_token_bucket_defer_blocks_until_timeout():
+    bucket = TokenBucket(rate=100, capacity=10)
+    bucket.defer(1.0)
+
+    assert bucket.acquire(timeout=0.05) is False
+
+
+# ------------------------------------------
+# 2. SingleFlight
+# ------------------------------------------
+def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait()
+        return {"foods": ["banana"]}
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        futures = [pool.submit(flight.do, "banana", slow) for _ in range(6)]
+        while flight.coalesced < 5:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_single_flight_propagates_errors_to_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait()
+        raise RuntimeError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, "x", failing) for _ in range(3)]
+        while flight.coalesced < 2:
+            time.sleep(0.01)
+        release.set()
+        for f in futures:
+            with pytest.raises(RuntimeError, match="upstream down"):
+                f.result()
+
+
+# ------------------------------------------
+# 3. NutritionLookup against a fake server
+# ------------------------------------------
+def test_concurrent_identical_lookups_hit_upstream_once(tmp_path, monkeypatch, nutritionix_credentials):
+    monkeypatch.setattr(tools, "DATA_DIR", str(tmp_path))
+    with FakeNutritionix(latency=0.2) as server:
+        monkeypatch.setattr(tools, "NUTRITIONIX_URL", server.url)
+        tool = tools.NutritionLookup()
+        queries = [["banana"], ["Banana"], ["  banana "], ["BANANA"]] * 2
+
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            results = list(pool.map(
+                lambda args: tool.forward(args[1], f"user{args[0]}", str(date.today())), enumerate(queries)
+            ))
+
+        assert server.request_count == 1
+        assert all(r["foods"] == ["banana"] for r in results)
+
+
+def test_hung_upstream_releases_leader_and_waiters(tmp_path, monkeypatch, nutritionix_credentials):
+    monkeypatch.setattr(tools, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(tools, "NUTRITIONIX_TIMEOUT", 0.2)
+    with FakeNutritionix(latency=2) as server:
+        monkeypatch.setattr(tools, "NUTRITIONIX_URL", server.url)
+        tool = tools.NutritionLookup()
+
+        def lookup(i):
+            with pytest.raises(requests.Timeout):
+                tool.forward(["kiwi"], f"user{i}", str(date.today()))
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lookup, range(3)))
+
+        assert time.monotonic() - start < 1.5
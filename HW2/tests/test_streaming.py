@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/test_streaming.py
+import json
+import pytest
+from unittest.mock import MagicMock
+
+import tools
+from budget import BudgetedAgent, RunBudget
+from streaming import stream_agent_run
+from fakes import ScriptedModel, code_step
+
+USER_INFO = ["Hana", 29, 61.0, 165.0, "female"]
+
+STEPS = [
+    code_step("lookup = nutrition_lookup(food=['oatmeal', 'banana'], name='Hana', log_date='2025-09-21')\nprint(lookup)"),
+    code_step(f"deficits = deficit_calculator(totals=lookup['totals'], user_info={USER_INFO!r}, log_date='2025-09-21')\n"
+              "trends = user_trends(user='Hana')\n"
+              f"final_answer(report_generator(user_info={USER_INFO!r}, totals=lookup['totals'], "
+              "deficits=str(deficits), trends=trends))"),
+]
+
+
+@pytest.fixture
+def hana(offline_tools, tmp_path):
+    """Hana has one earlier day logged, so today's run produces a trends narrative."""
+    with open(tmp_path / "hana.json", "w") as f:
+        json.dump({"name": "Hana", "history": [
+            {"date": "2025-09-20", "totals": {"calories": 1700, "protein": 55, "carbs": 190, "fat": 50}},
+        ]}, f)
+    return offline_tools
+
+
+# ------------------------------------------
+# 1. ReportGenerator sections
+# ------------------------------------------
+def test_iter_sections_matches_forward():
+    report = tools.ReportGenerator()
+    args = (USER_INFO, {"calories": 1800}, "Protein: Deficit", "Stable intake.")
+
+    sections = list(report.iter_sections(*args, errors="none"))
+
+    assert sections[0] == "--- Nutrition Report ---"
+    assert sections[2] == "Daily Totals: {'calories': 1800}"
+    assert "\n".join(sections) == report.forward(*args, errors="none")
+
+
+def test_iter_sections_resolves_callables_lazily():
+    report = tools.ReportGenerator()
+    trends = MagicMock(return_value="Stable intake.")
+
+    sections = report.iter_sections(None, {"calories": 1800}, None, trends)
+
+    assert next(sections) == "--- Nutrition Report ---"
+    assert next(sections) == "Daily Totals: {'calories': 1800}"
+    trends.assert_not_called()
+    assert next(sections) == "Long-Term Trends:\nStable intake."
+
+
+# ------------------------------------------
+# 2. UserTrends streaming
+# ------------------------------------------
+def test_user_trends_streams_summary_then_narrative(hana, tmp_path):
+    with open(tmp_path / "hana.json") as f:
+        data = json.load(f)
+    data["history"].append({"date": "2025-09-21", "totals": {"calories": 1900, "protein": 60, "carbs": 200, "fat": 60}})
+    with open(tmp_path / "hana.json", "w") as f:
+        json.dump(data, f)
+    trends = tools.UserTrends(model=ScriptedModel(narrative="Hana eats steadily."))
+
+    chunks = list(trends.stream("Hana"))
+
+    assert chunks[0].startswith("Over the past 2 days:")
+    assert len(chunks) > 2
+    assert "".join(chunks[1:]) == "Hana eats steadily."
+    assert "".join(chunks) == trends.forward("Hana")
+
+
+def test_user_trends_stream_falls_back_for_models_that_cannot_stream(hana, tmp_path):
+    with open(tmp_path / "hana.json") as f:
+        data = json.load(f)
+    data["history"].append({"date": "2025-09-21", "totals": {"calories": 1900, "protein": 60, "carbs": 200, "fat": 60}})
+    with open(tmp_path / "hana.json", "w") as f:
+        json.dump(data, f)
+    # A bare callable returning a dict response has no generate_stream.
+    trends = tools.UserTrends(model=lambda messages: {"role": "assistant", "content": "Hana eats steadily."})
+
+    chunks = list(trends.stream("Hana"))
+
+    assert chunks[1:] == ["Hana eats steadily."]
+    assert "".join(chunks) == trends.forward("Hana")
+
+
+def test_user_trends_stream_without_history():
+    assert list(tools.UserTrends(model=ScriptedModel()).stream("")) == ["No user name provided."]
+
+
+# ------------------------------------------
+# 3. Agent runs
+# ------------------------------------------
+def test_stream_agent_run_emits_sections_before_answer(hana, make_agent):
+    agent = make_agent(STEPS, narrative="Hana eats steadily.")
+
+    stream = stream_agent_run(agent, "Log Hana's breakfast.")
+    fragments = list(stream)
+    text = "".join(fragments)
+
+    assert fragments[0].startswith("Daily Totals:")
+    assert text.index("Deficits/Surpluses:") < text.index("Long-Term Trends:")
+    assert text.endswith("Hana eats steadily.\n")
+    assert stream.answer.startswith("--- Nutrition Report ---")
+    # The narrative arrives token by token rather than as one fragment.
+    assert "Hana " in fragments
+    # Hooks are removed once the run finishes.
+    assert "forward" not in agent.tools["nutrition_lookup"].__dict__
+    assert agent.tools["user_trends"].on_chunk is None
+
+
+def test_stream_agent_run_with_budget(hana, make_agent):
+    agent = make_agent(STEPS)
+    runner = BudgetedAgent(agent, RunBudget(max_tool_calls=2))
+
+    stream = stream_agent_run(agent, "Log Hana's breakfast.", run=runner.run, user_info=USER_INFO)
+    fragments = list(stream)
+
+    assert fragments[0].startswith("Daily Totals:")
+    assert "tool_calls budget exceeded" in stream.answer
@@ -24,7 +24,7 @@ from tools import (
 # 1. NutritionLookup
 # ------------------------------------------
 @patch("tools.requests.post")
-def test_nutrition_lookup_success(mock_post):
+def test_nutrition_lookup_success(mock_post, nutritionix_credentials):
     # Mock API response
     mock_post.return_value.status_code = 200
     mock_post.return_value.json.return_value = {
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "benchmarks"))
+
+# tests/test_warming.py
+import json
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+import tools
+from nutrition_cache import FoodFrequencyIndex, LookupCache
+from warming import warm_all, warm_in_background, warm_user
+from fakes import FakeNutritionix
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, nutritionix_credentials):
+    monkeypatch.setattr(tools, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(tools, "NUTRITION_CACHE", LookupCache(ttl=60))
+    with FakeNutritionix() as fake:
+        monkeypatch.setattr(tools, "NUTRITIONIX_URL", fake.url)
+        yield fake
+
+
+def log_foods(data_dir, name, days):
+    """Record `days` (lists of food phrases) in the frequency index, as lookups would."""
+    index = FoodFrequencyIndex.shared(str(data_dir))
+    for foods in days:
+        index.record(name, foods)
+
+
+# ------------------------------------------
+# 1. LookupCache
+# ------------------------------------------
+def test_lookup_cache_expires_and_evicts():
+    cache = LookupCache(ttl=0.05, max_entries=2)
+    cache.put("apple", [{"food_name": "apple"}])
+    cache.put("rice", [])
+    cache.get("apple")
+    cache.put("toast", [])
+
+    assert "rice" not in cache
+    assert cache.get("apple") == [{"food_name": "apple"}]
+    time.sleep(0.1)
+    assert cache.get("apple") is None
+    assert cache.stats()["hits"] == 2
+
+
+def test_disabled_cache_stores_nothing():
+    cache = LookupCache(ttl=0)
+    cache.put("apple", [])
+    assert not cache.enabled and cache.get("apple") is None
+
+
+# ------------------------------------------
+# 2. Frequency index
+# ------------------------------------------
+def test_index_counts_logged_phrases(tmp_path):
+    log_foods(tmp_path, "ivy", [["oatmeal", "coffee"], ["oatmeal", "salad"], ["oatmeal", "coffee"]])
+    index = FoodFrequencyIndex(str(tmp_path))
+
+    assert index.top("Ivy", 2) == ["oatmeal", "coffee"]
+    index.record("ivy", ["salad", "salad", "salad"])
+    assert index.top("ivy", 1) == ["salad"]
+    with open(tmp_path / "index" / "ivy.json") as f:
+        assert json.load(f)["counts"]["oatmeal"] == 3
+
+
+def test_missing_index_is_seeded_once_from_history(tmp_path, write_user):
+    write_user(tmp_path, "ivy", [("2025-09-18", 1800, 50), ("2025-09-19", 1900, 50)])
+    with open(tmp_path / "ivy.json") as f:
+        data = json.load(f)
+    data["history"][1]["foods"] = ["Rice", "coffee"]
+    with open(tmp_path / "ivy.json", "w") as f:
+        json.dump(data, f)
+    index = FoodFrequencyIndex(str(tmp_path))
+
+    assert index.top("ivy", 2) == ["rice", "beans"]
+    index.record("ivy", ["coffee", "coffee"])
+    with open(tmp_path / "index" / "ivy.json") as f:
+        assert json.load(f)["counts"] == {"rice": 2, "beans": 1, "coffee": 3}
+
+
+def test_concurrent_records_keep_every_count(tmp_path):
+    record = lambda _: FoodFrequencyIndex.shared(str(tmp_path)).record("ivy", ["apple"])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(record, range(50)))
+
+    assert FoodFrequencyIndex.shared(str(tmp_path)) is FoodFrequencyIndex.shared(str(tmp_path / "."))
+    with open(tmp_path / "index" / "ivy.json") as f:
+        assert json.load(f)["counts"]["apple"] == 50
+
+
+def test_lookup_updates_index_and_caches_each_food(server, tmp_path):
+    tool = tools.NutritionLookup()
+
+    tool.forward(["Apple", "rice"], "Ivy", "2025-09-20")
+    tool.forward(["rice", "apple"], "Ivy", "2025-09-21")
+
+    assert server.request_count == 1
+    assert FoodFrequencyIndex(str(tmp_path)).top("ivy") == ["apple", "rice"]
+
+
+def test_misaligned_response_is_not_cached_per_phrase(server, monkeypatch):
+    tool = tools.NutritionLookup()
+    # One multi-food phrase plus one unmatched phrase: as many foods as phrases, but not one per phrase.
+    monkeypatch.setattr(tool, "_fetch", lambda query: [{"food_name": "rice"}, {"food_name": "beans"}])
+
+    tool.forward(["rice and beans", "xyz"], "Ivy", "2025-09-20")
+
+    assert "rice and beans" not in tools.NUTRITION_CACHE and "xyz" not in tools.NUTRITION_CACHE
+
+
+# ------------------------------------------
+# 3. Warming
+# ------------------------------------------
+def test_warmed_foods_are_cache_hits(server, tmp_path):
+    log_foods(tmp_path, "ivy", [["oatmeal", "coffee"], ["oatmeal", "salad"], ["oatmeal", "coffee"]])
+
+    warm_in_background("Ivy", top_n=2).join(timeout=10)
+    requests_after_warming = server.request_count
+    result = tools.NutritionLookup().forward(["coffee", "Oatmeal"], "Ivy", "2025-09-20")
+
+    assert requests_after_warming == 2
+    assert server.request_count == 2
+    assert result["foods"] == ["coffee", "oatmeal"]
+    assert warm_user("Ivy", top_n=2) == 0  # already warm
+
+
+def test_warm_all_respects_include(server, tmp_path):
+    for name, foods in [("ivy", ["oatmeal"]), ("jon", ["pizza", "soda"])]:
+        (tmp_path / f"{name}.json").write_text(json.dumps({"name": name, "history": []}))
+        log_foods(tmp_path, name, [foods])
+
+    assert warm_all(include=lambda user: user == "jon") == {"jon": 2}
+    assert "pizza" in tools.NUTRITION_CACHE and "oatmeal" not in tools.NUTRITION_CACHE
+
+
+def test_warming_is_a_no_op_without_cache(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(tools, "NUTRITION_CACHE", LookupCache(ttl=0))
+    log_foods(tmp_path, "ivy", [["oatmeal"]])
+
+    assert warm_user("ivy") == 0
+    tools.NutritionLookup().forward(["oatmeal"], "Ivy", "2025-09-20")
+    assert server.request_count == 1
+    with open(tmp_path / "index" / "ivy.json") as f:
+        assert json.load(f)["counts"] == {"oatmeal": 2}  # logs are counted even with the cache off
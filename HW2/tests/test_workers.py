@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import sys, os
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# tests/test_workers.py
+import json
+import time
+import pytest
+
+import tools
+from ratelimit import TokenBucket
+from workers import ShardedDispatcher, shard_of, share_rate_limit
+
+
+def warm_context(data_dir):
+    return {"data_dir": data_dir, "pid": os.getpid(), "jobs": 0}
+
+
+def append_entry(context, user, value, delay=0.0):
+    """An unlocked read-modify-write of one user's file, like the tools do."""
+    context["jobs"] += 1
+    path = os.path.join(context["data_dir"], f"{user}.json")
+    entries = json.load(open(path)) if os.path.exists(path) else []
+    time.sleep(delay)
+    entries.append(value)
+    with open(path, "w") as f:
+        json.dump(entries, f)
+    return context["pid"]
+
+
+def job_count(context):
+    return context["jobs"]
+
+
+def fail(context, message):
+    raise ValueError(message)
+
+
+def broken_init():
+    raise RuntimeError("no model")
+
+
+# ------------------------------------------
+# 1. Sharding
+# ------------------------------------------
+def test_workers_split_the_nutritionix_quota(monkeypatch):
+    monkeypatch.setattr(tools, "NUTRITIONIX_LIMITER", TokenBucket(rate=5, capacity=10))
+
+    share_rate_limit(4)
+
+    assert (tools.NUTRITIONIX_LIMITER.rate, tools.NUTRITIONIX_LIMITER.capacity) == (1.25, 2.5)
+
+
+def test_shard_of_is_stable():
+    assert shard_of("Kevin", 8) == shard_of(" kevin ", 8) == shard_of("KEVIN", 8)
+    assert {shard_of(f"user{i}", 4) for i in range(100)} == {0, 1, 2, 3}
+
+
+def test_jobs_for_a_user_are_serialized_on_one_worker(tmp_path):
+    users = ["ann", "ben", "cat", "dan"]
+    with ShardedDispatcher(workers=3, init=warm_context, init_args=(str(tmp_path),)) as pool:
+        futures = {u: [pool.submit(u, append_entry, u, i, 0.002) for i in range(15)] for u in users}
+        pids = {u: {f.result() for f in fs} for u, fs in futures.items()}
+
+    for u in users:
+        assert len(pids[u]) == 1
+        with open(tmp_path / f"{u}.json") as f:
+            assert json.load(f) == list(range(15))
+    assert len(set().union(*pids.values())) > 1
+
+
+def test_worker_context_is_reused(tmp_path):
+    with ShardedDispatcher(workers=1, init=warm_context, init_args=(str(tmp_path),)) as pool:
+        for i in range(3):
+            pool.submit("ann", append_entry, "ann", i).result()
+        assert pool.submit("ann", job_count).result() == 3
+
+
+# ------------------------------------------
+# 2. Errors
+# ------------------------------------------
+def test_job_errors_propagate(tmp_path):
+    with ShardedDispatcher(workers=2, init=warm_context, init_args=(str(tmp_path),)) as pool:
+        with pytest.raises(ValueError, match="bad meal"):
+            pool.submit("ann", fail, "bad meal").result(timeout=10)
+        assert pool.submit("ann", append_entry, "ann", 1).result(timeout=10)
+        assert sum(m["failed"] for m in pool.metrics()) == 1
+
+
+def test_init_errors_are_raised():
+    with pytest.raises(RuntimeError, match="failed to initialize"):
+        ShardedDispatcher(workers=2, init=broken_init)
+
+
+# ------------------------------------------
+# 3. Metrics and shutdown
+# ------------------------------------------
+def test_queue_depth_and_drain(tmp_path):
+    pool = ShardedDispatcher(workers=2, init=warm_context, init_args=(str(tmp_path),))
+    futures = [pool.submit("ann", append_entry, "ann", i, 0.05) for i in range(5)]
+    worker = pool.shard_of("ann")
+
+    depth = pool.metrics()[worker]["queue_depth"]
+    pool.shutdown(drain=True)
+
+    assert depth >= 4
+    assert [f.result() for f in futures]
+    metrics = pool.metrics()[worker]
+    assert metrics["queue_depth"] == 0
+    assert metrics["completed"] == metrics["submitted"] == metrics["max_queue_depth"] == 5
+    with pytest.raises(RuntimeError):
+        pool.submit("ann", job_count)
+
+
+def test_shutdown_without_drain_cancels_queued_jobs(tmp_path):
+    pool = ShardedDispatcher(workers=1, init=warm_context, init_args=(str(tmp_path),))
+    futures = [pool.submit("ann", append_entry, "ann", i, 0.1) for i in range(10)]
+    time.sleep(0.05)
+
+    pool.shutdown(drain=False)
+
+    assert futures[0].result()
+    assert any(f.cancelled() for f in futures)
+    assert all(f.done() for f in futures)
+    assert pool.metrics()[0]["queue_depth"] == 0
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the HW1 nutrition agent and its lookup tool.
+
+Runs against FakeNutritionix and ScriptedModel. The scripted agent looks foods up
+one step at a time, which is how the real HW1 agent tends to behave. HW1 keeps
+no user history, so scenarios are parameterized over foods per log and concurrency.
+
+Usage:
+    python benchmarks/bench_hw1.py --output benchmarks/results/hw1.json
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "HW1", "src"))
+
+from fakes import FakeNutritionix, ScriptedModel, code_step
+from harness import offline_environment, print_results, run_scenario, save_results
+
+
+def agent_steps(foods):
+    """One lookup step per food followed by a final answer."""
+    steps = [
+        code_step(f"results.append(nutrition_lookup(food={food!r}))" if k else
+                  f"results = [nutrition_lookup(food={food!r})]", f"Look up {food}.")
+        for k, food in enumerate(foods)
+    ]
+    steps.append(code_step("final_answer('\\n'.join(results))", "Summarize."))
+    return steps
+
+
+def batch_agent_steps(foods):
+    """A single batched lookup followed by a final answer."""
+    return [
+        code_step(f"table = nutrition_batch_lookup(foods={foods!r})\nprint(table)", "Look everything up at once."),
+        code_step("final_answer(table)", "Summarize."),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results", "hw1.json"))
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per worker per scenario.")
+    parser.add_argument("--foods", type=int, nargs="+", default=[1, 5, 20], help="Foods per log.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent agent runs.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected Nutritionix latency (seconds).")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with FakeNutritionix(latency=args.latency) as server:
+        offline_environment(server)
+        import tools
+        import agent as hw1_agent
+        from smolagents import LogLevel
+
+        tools.NUTRITIONIX_URL = server.url
+        measure_memory = not args.no_memory
+
+        def scenario(name, make_task, concurrency=1):
+            results[name] = run_scenario(make_task, args.iterations, concurrency, measure_memory=measure_memory)
+            print(f"  {name}", file=sys.stderr)
+
+        for n_foods in args.foods:
+            query = "; ".join(f"food {k}" for k in range(n_foods))
+            lookup = tools.NutritionLookup()
+            scenario(f"tool.nutrition_lookup[foods={n_foods}]",
+                     lambda w, lookup=lookup, query=query: lambda i: lookup.forward(query))
+            batch = tools.NutritionBatchLookup()
+            foods = [f"food {k}" for k in range(n_foods)]
+            scenario(f"tool.nutrition_batch_lookup[foods={n_foods}]",
+                     lambda w, batch=batch, foods=foods: lambda i: batch.forward(foods))
+
+        for n_foods in args.foods:
+            foods = [f"food {k}" for k in range(n_foods)]
+            for concurrency in args.concurrency:
+                def make_task(w, foods=foods):
+                    run_model = ScriptedModel(steps=agent_steps(foods))
+                    # Allow one step per food plus the answer; the production agent caps this at 6.
+                    run_agent = hw1_agent.build_agent(run_model, verbosity_level=LogLevel.OFF,
+                                                      max_steps=len(foods) + 1)
+                    return lambda i: run_agent.run(f"Here is everything I ate today: {'; '.join(foods)}.")
+
+                scenario(f"agent.run[foods={n_foods},concurrency={concurrency}]", make_task, concurrency)
+
+                def make_batch_task(w, foods=foods):
+                    run_model = ScriptedModel(steps=batch_agent_steps(foods))
+                    run_agent = hw1_agent.build_agent(run_model, verbosity_level=LogLevel.OFF)
+                    return lambda i: run_agent.run(f"Here is everything I ate today: {'; '.join(foods)}.")
+
+                scenario(f"agent.run.batch[foods={n_foods},concurrency={concurrency}]", make_batch_task, concurrency)
+
+        server_stats = {"requests": server.request_count, "errors": server.error_count}
+
+    save_results(args.output, "hw1", results, fake_nutritionix=server_stats)
+    print_results(results)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the HW2 nutrition agent and each of its tools.
+
+Everything runs against FakeNutritionix and ScriptedModel, so results are
+reproducible and cost nothing. Scenarios are parameterized over user history
+length, foods per log and concurrency (threads, each with its own agent).
+
+Usage:
+    python benchmarks/bench_hw2.py --output benchmarks/results/hw2.json
+    python benchmarks/compare.py old.json new.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "HW2", "src"))
+
+from fakes import FakeNutritionix, ScriptedModel, code_step
+from harness import offline_environment, print_results, run_scenario, save_results, seed_user
+
+PROFILE = (30, 70.0, 175.0, "male")
+
+
+def agent_steps(name, foods, log_date):
+    """The tool sequence a well-behaved run of the HW2 agent performs, as two code steps."""
+    age, weight, height, gender = PROFILE
+    user_info = [name, age, weight, height, gender]
+    return [
+        code_step(
+            f"lookup = nutrition_lookup(food={foods!r}, name={name!r}, log_date={log_date!r})\n"
+            "print(lookup)",
+            "Log the foods first.",
+        ),
+        code_step(
+            f"profile = user_tracker(data={{'name': {name!r}}}, action='retrieve')\n"
+            f"deficits = deficit_calculator(totals=lookup['totals'], user_info={user_info!r}, log_date={log_date!r})\n"
+            f"trends = user_trends(user={name!r})\n"
+            f"report = report_generator(user_info={user_info!r}, totals=lookup['totals'], "
+            "deficits=str(deficits), trends=trends)\n"
+            "final_answer(report)",
+            "Analyze and report.",
+        ),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results", "hw2.json"))
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per worker per scenario.")
+    parser.add_argument("--history", type=int, nargs="+", default=[7, 90, 365], help="Days of user history.")
+    parser.add_argument("--foods", type=int, nargs="+", default=[1, 5, 20], help="Foods per log.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrent agent runs.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected Nutritionix latency (seconds).")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with FakeNutritionix(latency=args.latency) as server, tempfile.TemporaryDirectory() as data_dir:
+        offline_environment(server)
+        import tools
+        import agent as hw2_agent
+        from smolagents import LogLevel
+
+        tools.NUTRITIONIX_URL = server.url
+        tools.DATA_DIR = data_dir
+        # Measure our own code, not the upstream quota.
+        tools.NUTRITIONIX_LIMITER.rate = 0
+        log_date = str(date.today())
+        age, weight, height, gender = PROFILE
+        measure_memory = not args.no_memory
+
+        def scenario(name, make_task, concurrency=1):
+            results[name] = run_scenario(make_task, args.iterations, concurrency, measure_memory=measure_memory)
+            print(f"  {name}", file=sys.stderr)
+
+        model = ScriptedModel()
+
+        # --- Tools in isolation ---
+        for n_foods in args.foods:
+            foods = [f"food {k}" for k in range(n_foods)]
+            lookup = tools.NutritionLookup()
+            scenario(f"tool.nutrition_lookup[foods={n_foods}]",
+                     lambda w, lookup=lookup, foods=foods: lambda i: lookup.forward(foods, f"lookup_{w}", log_date))
+
+        report = tools.ReportGenerator()
+        scenario("tool.report_generator",
+                 lambda w: lambda i: report.forward([f"u{w}", age, weight, height, gender],
+                                                    {"calories": 2000}, "Balanced", "Stable"))
+
+        for days in args.history:
+            user = f"hist_{days}"
+            seed_user(data_dir, user, days, profile=PROFILE)
+            tracker = tools.UserTracker(data_dir=data_dir)
+            trends = tools.UserTrends(model=model)
+            deficit = tools.DeficitCalculator()
+            scenario(f"tool.user_tracker.retrieve[history={days}]",
+                     lambda w, tracker=tracker, user=user: lambda i: tracker.forward({"name": user}, "retrieve"))
+            scenario(f"tool.user_trends[history={days}]",
+                     lambda w, trends=trends, user=user: lambda i: trends.forward(user))
+            scenario(f"tool.deficit_calculator[history={days}]",
+                     lambda w, deficit=deficit, user=user: lambda i: deficit.forward(
+                         {"calories": 1800, "protein": 60, "carbs": 200, "fat": 50},
+                         [user, age, weight, height, gender], log_date))
+
+        # --- Full agent runs ---
+        for days in args.history:
+            for n_foods in args.foods:
+                foods = [f"food {k}" for k in range(n_foods)]
+                for concurrency in args.concurrency:
+                    def make_task(w, days=days, foods=foods, concurrency=concurrency):
+                        user = f"agent_{days}_{len(foods)}_{concurrency}_{w}"
+                        seed_user(data_dir, user, days, profile=PROFILE)
+                        run_model = ScriptedModel(steps=agent_steps(user, foods, log_date))
+                        run_tools = hw2_agent.build_tools(run_model)
+                        run_tools[1] = tools.UserTracker(data_dir=data_dir)
+                        run_agent = hw2_agent.build_agent(run_model, run_tools, verbosity_level=LogLevel.OFF)
+                        return lambda i: run_agent.run(f"User: {user}. Date: {log_date}. Food eaten: {', '.join(foods)}.")
+
+                    scenario(f"agent.run[history={days},foods={n_foods},concurrency={concurrency}]",
+                             make_task, concurrency)
+
+        server_stats = {"requests": server.request_count, "errors": server.error_count}
+
+    save_results(args.output, "hw2", results, fake_nutritionix=server_stats)
+    print_results(results)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files and flag regressions.
+
+A scenario regresses when its p50 or p99 latency grows, or its throughput drops,
+by more than `--threshold` (a fraction) relative to the baseline. Exits with
+status 1 if any scenario regressed so it can gate CI.
+
+Usage:
+    python benchmarks/compare.py baseline.json current.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+
+
+def compare(baseline, current, threshold):
+    """Return (rows, regressed); each row is (scenario, metric, old, new, change, is_regression)."""
+    rows = []
+    regressed = False
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        checks = [
+            ("p50_ms", old["latency_ms"]["p50"], new["latency_ms"]["p50"], False),
+            ("p99_ms", old["latency_ms"]["p99"], new["latency_ms"]["p99"], False),
+            ("ops_per_s", old["throughput_per_s"], new["throughput_per_s"], True),
+        ]
+        for metric, before, after, higher_is_better in checks:
+            if not before:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            is_regression = worse > threshold
+            regressed |= is_regression
+            rows.append((name, metric, before, after, change, is_regression))
+    return rows, regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown (default 0.15).")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows, regressed = compare(baseline, current, args.threshold)
+    print(f"baseline {baseline['meta']['git_revision']} vs current {current['meta']['git_revision']}")
+    for name, metric, before, after, change, is_regression in rows:
+        flag = "REGRESSION" if is_regression else ""
+        print(f"{name:<58} {metric:<10} {before:>10.2f} -> {after:>10.2f} ({change:+.1%}) {flag}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins for the two external services the agents talk to:
+
+- FakeNutritionix: a local HTTP server speaking enough of the Nutritionix
+  `natural/nutrients` API for the tools, with deterministic nutrient values,
+  request counting, and optional latency / error injection.
+- ScriptedModel: a smolagents Model that replays scripted CodeAgent steps and
+  a canned narrative for direct (non-agent) calls such as UserTrends.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from smolagents import ChatMessage, Model
+from smolagents.models import ChatMessageStreamDelta, MessageRole
+from smolagents.monitoring import TokenUsage
+
+NUTRIENTS_PATH = "/v2/natural/nutrients"
+
+
+def fake_nutrients(food: str) -> dict:
+    """Deterministic Nutritionix-style record for a food description."""
+    name = food.strip().lower()
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return {
+        "food_name": name,
+        "serving_qty": 1,
+        "serving_unit": "serving",
+        "nf_calories": round(50 + digest[0] / 255 * 600, 2),
+        "nf_protein": round(digest[1] / 255 * 40, 2),
+        "nf_total_carbohydrate": round(digest[2] / 255 * 80, 2),
+        "nf_total_fat": round(digest[3] / 255 * 30, 2),
+    }
+
+
+def split_query(query: str) -> list[str]:
+    """Split a natural language query into food items the way the fake parses it."""
+    parts = re.split(r",|;|\band\b", query)
+    return [p.strip() for p in parts if p.strip()]
+
+
+class FakeNutritionix:
+    """
+    A threaded local HTTP server that mimics the Nutritionix nutrients endpoint.
+
+    Use as a context manager; `url` is the full nutrients URL to point the tools at.
+    `latency` (seconds, plus up to `jitter` extra) and `error_rate` (0..1, answered
+    with `error_status`) are applied to every request. Foods listed in `unknown`
+    get a 404 like the real API.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=500, unknown=(), seed=0, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.unknown = {u.strip().lower() for u in unknown}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+        self.queries = []
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{NUTRIENTS_PATH}"
+
+    def reset(self):
+        with self._lock:
+            self.request_count = 0
+            self.error_count = 0
+            self.queries = []
+
+    def _handle(self, path: str, body: bytes):
+        """Return (status, payload) for a single request."""
+        with self._lock:
+            self.request_count += 1
+            fail = self.error_rate and self._random.random() < self.error_rate
+            if fail:
+                self.error_count += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if path != NUTRIENTS_PATH:
+            return 404, {"message": "Not found"}
+        if fail:
+            return self.error_status, {"message": "Injected failure"}
+
+        query = json.loads(body or b"{}").get("query", "")
+        with self._lock:
+            self.queries.append(query)
+        items = split_query(query)
+        if not items or any(i.lower() in self.unknown for i in items):
+            return 404, {"message": "We couldn't match any of your foods"}
+        return 200, {"foods": [fake_nutrients(i) for i in items]}
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                status, payload = fake._handle(self.path, self.rfile.read(length))
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # Load tests open hundreds of connections at once; the default backlog of 5 refuses them.
+            request_queue_size = 1024
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _role(message):
+    return message["role"] if isinstance(message, dict) else message.role
+
+
+def _text(message):
+    content = message["content"] if isinstance(message, dict) else message.content
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+class ScriptedModel(Model):
+    """
+    A deterministic model for offline runs.
+
+    Agent calls (those passing `stop_sequences`) get `steps[i]`, where `i` is the
+    number of assistant turns already in the conversation; the last step is
+    repeated if the agent keeps going. Direct calls get `narrative`.
+    Token usage is estimated at ~4 characters per token so budgets can be exercised.
+    """
+
+    def __init__(self, steps=(), narrative="Intake is steady; keep tracking.", latency=0.0, model_id="scripted-model"):
+        super().__init__(model_id=model_id)
+        self.steps = list(steps)
+        self.narrative = narrative
+        self.latency = latency
+        self.calls = 0
+
+    def generate_stream(self, messages, stop_sequences=None, response_format=None, tools_to_call_from=None, **kwargs):
+        """Stream the same content `generate` would return, a word at a time."""
+        message = self.generate(messages, stop_sequences=stop_sequences, **kwargs)
+        for word in re.findall(r"\S+\s*", message.content):
+            yield ChatMessageStreamDelta(content=word)
+        yield ChatMessageStreamDelta(content="", token_usage=message.token_usage)
+
+    def generate(self, messages, stop_sequences=None, response_format=None, tools_to_call_from=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if stop_sequences is None or not self.steps:
+            content = self.narrative
+        else:
+            turn = sum(1 for m in messages if _role(m) == MessageRole.ASSISTANT)
+            content = self.steps[min(turn, len(self.steps) - 1)]
+        prompt_chars = sum(len(_text(m)) for m in messages)
+        return ChatMessage(
+            role=MessageRole.ASSISTANT,
+            content=content,
+            token_usage=TokenUsage(input_tokens=prompt_chars // 4, output_tokens=len(content) // 4),
+        )
+
+
+def code_step(code: str, thought: str = "Calling the tools.") -> str:
+    """Format `code` as a CodeAgent step the default parser accepts."""
+    return f"Thought: {thought}\n<code>\n{code}\n</code>"
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Timing, memory and result-file helpers shared by the benchmark scripts.
+"""
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from fakes import fake_nutrients
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (pct in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(latencies):
+    """Latency stats in milliseconds."""
+    ms = [v * 1000 for v in latencies]
+    return {
+        "mean": sum(ms) / len(ms) if ms else 0.0,
+        "p50": percentile(ms, 50),
+        "p90": percentile(ms, 90),
+        "p99": percentile(ms, 99),
+        "max": max(ms) if ms else 0.0,
+    }
+
+
+def run_scenario(make_task, iterations, concurrency=1, warmup=1, measure_memory=True):
+    """
+    Run a benchmark scenario and return its metrics.
+
+    `make_task(worker)` is called once per worker thread and returns a callable
+    `task(i)`; each worker runs `warmup` untimed calls followed by `iterations`
+    timed calls. Memory is measured in a separate single-worker pass under
+    tracemalloc so the timed pass is not slowed down by it.
+    """
+    tasks = [make_task(w) for w in range(concurrency)]
+    for task in tasks:
+        for i in range(warmup):
+            task(-1 - i)
+
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(w):
+        barrier.wait()
+        for i in range(iterations):
+            start = time.perf_counter()
+            try:
+                tasks[w](i)
+            except Exception:
+                errors[w] += 1
+            latencies[w].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    flat = [v for per_worker in latencies for v in per_worker]
+    result = {
+        "iterations": len(flat),
+        "concurrency": concurrency,
+        "errors": sum(errors),
+        "elapsed_s": elapsed,
+        "throughput_per_s": len(flat) / elapsed if elapsed else 0.0,
+        "latency_ms": latency_summary(flat),
+    }
+
+    if measure_memory:
+        task = make_task(0)
+        tracemalloc.start()
+        try:
+            for i in range(min(iterations, 3)):
+                try:
+                    task(iterations + i)
+                except Exception:
+                    pass
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["peak_alloc_kb"] = peak / 1024
+    return result
+
+
+def environment_info():
+    """Metadata recorded alongside results so runs can be compared fairly."""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": revision,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(path, suite, results, **extra):
+    """Write `results` ({scenario: metrics}), environment metadata and `extra` to `path` as JSON."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    payload = {
+        "suite": suite,
+        "meta": environment_info(),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+        **extra,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return payload
+
+
+def print_results(results):
+    print(f"{'scenario':<58} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak KB':>9} {'err':>4}")
+    for name, r in results.items():
+        lat = r["latency_ms"]
+        print(
+            f"{name:<58} {r['throughput_per_s']:>9.1f} {lat['p50']:>9.2f} {lat['p99']:>9.2f} "
+            f"{r.get('peak_alloc_kb', 0):>9.0f} {r['errors']:>4}"
+        )
+
+
+def make_history(days, foods_per_day, end=None):
+    """Deterministic HW2-style history ending at `end` (defaults to today)."""
+    end = end or date.today()
+    history = []
+    for d in range(days):
+        day = end - timedelta(days=days - 1 - d)
+        foods = [f"food {(d * 7 + k) % 50}" for k in range(foods_per_day)]
+        items = [fake_nutrients(f) for f in foods]
+        history.append({
+            "date": str(day),
+            "foods": foods,
+            "totals": {
+                "calories": round(sum(i["nf_calories"] for i in items), 2),
+                "protein": round(sum(i["nf_protein"] for i in items), 2),
+                "carbs": round(sum(i["nf_total_carbohydrate"] for i in items), 2),
+                "fat": round(sum(i["nf_total_fat"] for i in items), 2),
+            },
+            "analysis": {},
+        })
+    return history
+
+
+def seed_user(data_dir, name, history_days, foods_per_day=3, profile=(30, 70.0, 175.0, "male")):
+    """Write a user file with `history_days` days of history and return its path."""
+    age, weight, height, gender = profile
+    user = {
+        "name": name,
+        "age": age,
+        "weight": weight,
+        "height": height,
+        "gender": gender,
+        "history": make_history(history_days, foods_per_day),
+    }
+    path = os.path.join(data_dir, f"{name.lower()}.json")
+    with open(path, "w") as f:
+        json.dump(user, f, indent=2)
+    return path
+
+
+def offline_environment(fake_server):
+    """Set the env vars the agent modules need so they import without real credentials."""
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("NUTRITIONIX_APP_ID", "offline-benchmark")
+    os.environ.setdefault("NUTRITIONIX_API_KEY", "offline-benchmark")
+    os.environ["NUTRITIONIX_URL"] = fake_server.url
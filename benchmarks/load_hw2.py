@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Load generator for the HW2 tools: many simulated users logging meals at once.
+
+Each simulated user runs a random (but seeded) sequence of operations drawn from
+a log/report/trend mix, with exponential think time between operations, against
+a local FakeNutritionix that injects latency and errors. Afterwards every user
+file is checked for integrity: it must parse, and every successfully logged food
+must still be present under its date (lost read-modify-write updates show up here).
+
+Operations:
+    log     nutrition_lookup + deficit_calculator for a meal
+    report  user_tracker retrieve + deficit_calculator + user_trends + report_generator
+    trend   user_trends
+
+Usage:
+    python benchmarks/load_hw2.py --users 200 --ops 10 --latency 0.05 --error-rate 0.02
+    python benchmarks/load_hw2.py --users 50 --accounts 5 --mode process --workers 8
+    python benchmarks/load_hw2.py --users 50 --accounts 5 --mode sharded --workers 8
+
+In sharded mode the simulated users run as threads but every operation is sent
+to a ShardedDispatcher keyed by account, so each user file has a single writer.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "HW2", "src"))
+
+from fakes import FakeNutritionix, ScriptedModel
+from harness import latency_summary, offline_environment, save_results, seed_user
+from workers import ShardedDispatcher
+
+PROFILE = (30, 70.0, 175.0, "male")
+MENU = ["apple", "banana", "oatmeal", "2 eggs", "toast", "rice", "chicken breast", "salad",
+        "pizza", "coffee", "yogurt", "pasta", "salmon", "soda", "cheeseburger", "orange juice"]
+
+
+def parse_mix(text):
+    """Parse 'log=0.6,report=0.25,trend=0.15' into a weights dict."""
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        if op.strip() not in {"log", "report", "trend"}:
+            raise argparse.ArgumentTypeError(f"Unknown operation in mix: {op!r}")
+        mix[op.strip()] = float(weight)
+    return mix
+
+
+# -----------------------------
+# Per-process tool setup
+# -----------------------------
+_tools = None
+
+
+def _init_tools(url, data_dir, llm_latency, rate=None, burst=None):
+    """Configure the tools module for this process and build one set of tool instances."""
+    global _tools
+    os.environ.setdefault("NUTRITIONIX_APP_ID", "load-test")
+    os.environ.setdefault("NUTRITIONIX_API_KEY", "load-test")
+    import tools
+
+    tools.NUTRITIONIX_URL = url
+    tools.DATA_DIR = data_dir
+    if rate is not None:
+        tools.NUTRITIONIX_LIMITER.rate = rate
+    if burst is not None:
+        tools.NUTRITIONIX_LIMITER.capacity = burst
+    model = ScriptedModel(latency=llm_latency)
+    _tools = {
+        "lookup": tools.NutritionLookup(),
+        "tracker": tools.UserTracker(data_dir=data_dir),
+        "deficit": tools.DeficitCalculator(),
+        "trends": tools.UserTrends(model=model),
+        "report": tools.ReportGenerator(),
+    }
+    return _tools
+
+
+def perform_op(op, account, foods, log_date, tools_by_name=None):
+    """Run one operation with this process's tools; returns the foods it logged."""
+    tools_by_name = tools_by_name or _tools
+    user_info = [account, *PROFILE]
+    if op == "log":
+        result = tools_by_name["lookup"].forward(foods, account, log_date)
+        tools_by_name["deficit"].forward(result["totals"], user_info, log_date)
+        return result["foods"]
+    if op == "report":
+        user = json.loads(tools_by_name["tracker"].forward({"name": account}, "retrieve"))
+        totals = user["history"][-1].get("totals", {}) if user["history"] else {}
+        deficits = tools_by_name["deficit"].forward(totals, user_info, log_date)
+        trends = tools_by_name["trends"].forward(account)
+        tools_by_name["report"].forward(user_info, totals, str(deficits), trends)
+    else:
+        tools_by_name["trends"].forward(account)
+    return []
+
+
+def _sharded_op(context, op, account, foods, log_date):
+    return perform_op(op, account, foods, log_date, context)
+
+
+def simulate_user(user_index, account, mix, ops, think, seed, log_date, dispatcher=None):
+    """
+    Run one simulated user's session and return its records.
+
+    Returns {"records": [(op, seconds, error_type or None)], "logged": [foods...]},
+    where `logged` lists the foods of every log operation that completed. With a
+    `dispatcher`, operations run on the account's worker instead of in this process.
+    """
+    rng = random.Random(seed * 100003 + user_index)
+    records = []
+    logged = []
+    ops_names, weights = zip(*mix.items())
+    for _ in range(ops):
+        if think:
+            time.sleep(rng.expovariate(1 / think))
+        op = rng.choices(ops_names, weights)[0]
+        foods = rng.sample(MENU, rng.randint(1, 4)) if op == "log" else None
+        start = time.perf_counter()
+        error = None
+        try:
+            if dispatcher is None:
+                logged.extend(perform_op(op, account, foods, log_date))
+            else:
+                logged.extend(dispatcher.submit(account, _sharded_op, op, account, foods, log_date).result())
+        except Exception as e:
+            error = type(e).__name__
+        records.append((op, time.perf_counter() - start, error))
+    return {"account": account, "records": records, "logged": logged}
+
+
+def _simulate_many(batch, mix, ops, think, seed, log_date):
+    return [simulate_user(i, account, mix, ops, think, seed, log_date) for i, account in batch]
+
+
+# -----------------------------
+# Integrity checks
+# -----------------------------
+def check_integrity(data_dir, expected, log_date):
+    """
+    Compare user files against the foods each account successfully logged.
+
+    `expected` maps account -> Counter of foods logged on `log_date`.
+    Returns a list of human-readable problems (empty when everything is intact).
+    """
+    problems = []
+    for account, foods in sorted(expected.items()):
+        path = os.path.join(data_dir, f"{account.lower()}.json")
+        try:
+            with open(path) as f:
+                user = json.load(f)
+        except FileNotFoundError:
+            problems.append(f"{account}: user file missing")
+            continue
+        except json.JSONDecodeError as e:
+            problems.append(f"{account}: corrupt JSON ({e})")
+            continue
+
+        dates = [h.get("date") for h in user.get("history", [])]
+        duplicates = [d for d, n in Counter(dates).items() if n > 1]
+        if duplicates:
+            problems.append(f"{account}: duplicate history dates {duplicates}")
+        entry = next((h for h in user.get("history", []) if h.get("date") == log_date), None)
+        stored = Counter(entry.get("foods", [])) if entry else Counter()
+        missing = foods - stored
+        if missing:
+            problems.append(f"{account}: {sum(missing.values())} logged food(s) lost: {dict(missing)}")
+        if foods and entry and not entry.get("analysis"):
+            problems.append(f"{account}: {log_date} has foods but no analysis")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="Simulated concurrent users.")
+    parser.add_argument("--accounts", type=int, default=None,
+                        help="Distinct user files the simulated users map onto (default: one per user).")
+    parser.add_argument("--ops", type=int, default=10, help="Operations per simulated user.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("log=0.6,report=0.25,trend=0.15"))
+    parser.add_argument("--think", type=float, default=0.0, help="Mean think time between operations (seconds).")
+    parser.add_argument("--mode", choices=["thread", "process", "sharded"], default="thread")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes in process/sharded mode.")
+    parser.add_argument("--latency", type=float, default=0.02, help="Base Nutritionix latency (seconds).")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra random Nutritionix latency (seconds).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of Nutritionix calls that fail.")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status used for injected failures.")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Nutritionix requests/second per process (0 = unlimited; default: NUTRITIONIX_RATE).")
+    parser.add_argument("--burst", type=float, default=None, help="Nutritionix burst size (default: NUTRITIONIX_BURST).")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Scripted model latency (seconds).")
+    parser.add_argument("--history", type=int, default=14, help="Days of history seeded per account.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None, help="Where user files go (default: a temp dir).")
+    parser.add_argument("--output", default=None, help="Optional JSON results path.")
+    args = parser.parse_args(argv)
+
+    accounts = [f"load_user_{i}" for i in range(args.accounts or args.users)]
+    worker_metrics = None
+    log_date = str(date.today())
+
+    with FakeNutritionix(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                         error_status=args.error_status, seed=args.seed) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        offline_environment(server)
+        for account in accounts:
+            seed_user(data_dir, account, args.history, profile=PROFILE)
+
+        assignments = [(i, accounts[i % len(accounts)]) for i in range(args.users)]
+        start = time.perf_counter()
+        if args.mode == "thread":
+            _init_tools(server.url, data_dir, args.llm_latency, args.rate, args.burst)
+            with ThreadPoolExecutor(max_workers=args.users) as pool:
+                futures = [pool.submit(simulate_user, i, account, args.mix, args.ops, args.think, args.seed, log_date)
+                           for i, account in assignments]
+                sessions = [f.result() for f in futures]
+        elif args.mode == "sharded":
+            with ShardedDispatcher(workers=args.workers, init=_init_tools,
+                                   init_args=(server.url, data_dir, args.llm_latency, args.rate, args.burst)) as dispatcher, \
+                    ThreadPoolExecutor(max_workers=args.users) as pool:
+                futures = [pool.submit(simulate_user, i, account, args.mix, args.ops, args.think, args.seed, log_date,
+                                       dispatcher) for i, account in assignments]
+                sessions = [f.result() for f in futures]
+                worker_metrics = dispatcher.metrics()
+        else:
+            batches = [assignments[w::args.workers] for w in range(args.workers)]
+            with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_tools,
+                                     initargs=(server.url, data_dir, args.llm_latency, args.rate, args.burst)) as pool:
+                futures = [pool.submit(_simulate_many, batch, args.mix, args.ops, args.think, args.seed, log_date)
+                           for batch in batches if batch]
+                sessions = [s for f in futures for s in f.result()]
+        elapsed = time.perf_counter() - start
+
+        by_op = defaultdict(list)
+        errors = Counter()
+        expected = defaultdict(Counter)
+        for session in sessions:
+            expected[session["account"]].update(session["logged"])
+            for op, seconds, error in session["records"]:
+                by_op[op].append(seconds)
+                if error:
+                    errors[f"{op}:{error}"] += 1
+        problems = check_integrity(data_dir, expected, log_date)
+        upstream = {"requests": server.request_count, "errors": server.error_count}
+
+    total_ops = sum(len(v) for v in by_op.values())
+    results = {
+        op: {
+            "count": len(latencies),
+            "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+            "latency_ms": latency_summary(latencies),
+        }
+        for op, latencies in sorted(by_op.items())
+    }
+    summary = {
+        "mode": args.mode,
+        "users": args.users,
+        "accounts": len(accounts),
+        "elapsed_s": elapsed,
+        "total_ops": total_ops,
+        "throughput_per_s": total_ops / elapsed if elapsed else 0.0,
+        "errors": dict(errors),
+        "integrity_problems": problems,
+        "nutritionix": upstream,
+    }
+    if worker_metrics is not None:
+        summary["workers"] = worker_metrics
+
+    print(f"{args.users} users ({len(accounts)} accounts, {args.mode} mode): "
+          f"{total_ops} ops in {elapsed:.2f}s = {summary['throughput_per_s']:.1f} ops/s")
+    print(f"{'op':<8} {'count':>7} {'ops/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for op, r in results.items():
+        lat = r["latency_ms"]
+        print(f"{op:<8} {r['count']:>7} {r['throughput_per_s']:>9.1f} {lat['p50']:>9.1f} "
+              f"{lat['p90']:>9.1f} {lat['p99']:>9.1f} {lat['max']:>9.1f}")
+    print(f"Nutritionix: {upstream['requests']} requests, {upstream['errors']} injected errors")
+    if worker_metrics is not None:
+        print("Workers: " + ", ".join(f"#{m['worker']} {m['completed']} jobs (max queue {m['max_queue_depth']})"
+                                      for m in worker_metrics))
+    print(f"Errors: {dict(errors) or 'none'}")
+    print(f"Integrity: {len(problems)} problem(s)")
+    for problem in problems[:20]:
+        print(f"  - {problem}")
+
+    if args.output:
+        save_results(args.output, "hw2-load", results, summary=summary)
+    return summary
+
+
+if __name__ == "__main__":
+    summary = main()
+    sys.exit(1 if summary["integrity_problems"] else 0)
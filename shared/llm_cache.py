@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+An on-disk response cache for the LLM used by the HW1 and HW2 agents.
+
+CachedModel wraps any smolagents Model (OpenAIServerModel in production) and
+keys each completion on (model id, messages, stop sequences, response format,
+tools and generation parameters). Entries are JSON files under `cache_dir`,
+expire after `ttl` seconds and are evicted least-recently-used beyond
+`max_entries`.
+
+Modes:
+    readwrite  serve hits, call the model and store on misses (default)
+    record     always call the model and overwrite the stored entry
+    replay     serve hits only; a miss raises CacheMiss (deterministic tests)
+    off        pass everything through
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from smolagents import ChatMessage, Model
+from smolagents.models import ChatMessageStreamDelta, MessageRole, agglomerate_stream_deltas
+from smolagents.monitoring import TokenUsage
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".llm_cache")
+MODES = {"readwrite", "record", "replay", "off"}
+
+
+class CacheMiss(KeyError):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def _plain(message):
+    """A JSON-friendly view of a message that ignores raw payloads and token counts."""
+    if isinstance(message, ChatMessage):
+        message = message.dict()
+    message = {k: v for k, v in message.items() if k not in {"raw", "token_usage"}}
+    role = message.get("role")
+    message["role"] = role.value if isinstance(role, MessageRole) else role
+    return message
+
+
+def cache_key(model_id, messages, **params) -> str:
+    """Stable hash of a completion request."""
+    request = {
+        "model_id": model_id,
+        "messages": [_plain(m) for m in messages],
+        "params": params,
+    }
+    blob = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class CachedModel(Model):
+    """A caching wrapper around `model`; see the module docstring for modes."""
+
+    def __init__(self, model, cache_dir=CACHE_DIR, ttl=None, max_entries=None, mode="readwrite"):
+        if mode not in MODES:
+            raise ValueError(f"Invalid cache mode {mode!r}. Must be one of: {', '.join(sorted(MODES))}.")
+        super().__init__(model_id=getattr(model, "model_id", None))
+        self.model = model
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._entries = len(self._paths())
+
+    @classmethod
+    def from_env(cls, model):
+        """
+        Wrap `model` according to NUTRITION_LLM_CACHE (mode), NUTRITION_LLM_CACHE_DIR,
+        NUTRITION_LLM_CACHE_TTL (seconds) and NUTRITION_LLM_CACHE_MAX_ENTRIES.
+        Returns `model` unchanged when NUTRITION_LLM_CACHE is unset or "off".
+        """
+        mode = os.getenv("NUTRITION_LLM_CACHE", "off").strip().lower()
+        if mode == "off":
+            return model
+        ttl = os.getenv("NUTRITION_LLM_CACHE_TTL")
+        max_entries = os.getenv("NUTRITION_LLM_CACHE_MAX_ENTRIES")
+        return cls(
+            model,
+            cache_dir=os.getenv("NUTRITION_LLM_CACHE_DIR", CACHE_DIR),
+            ttl=float(ttl) if ttl else None,
+            max_entries=int(max_entries) if max_entries else None,
+            mode=mode,
+        )
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": self._entries, "mode": self.mode}
+
+    # -----------------------------
+    # Storage
+    # -----------------------------
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _paths(self):
+        return [
+            os.path.join(root, name)
+            for root, _, names in os.walk(self.cache_dir)
+            for name in names
+            if name.endswith(".json")
+        ]
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self.ttl is not None and time.time() - entry["created"] > self.ttl:
+            self._delete(path)
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except FileNotFoundError:
+            pass  # evicted by another thread or process since it was read; the entry is still good
+        return entry
+
+    def _delete(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._entries -= 1
+
+    def _store(self, key, message: ChatMessage):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        usage = message.token_usage
+        entry = {
+            "created": time.time(),
+            "model_id": self.model_id,
+            "response": _plain(message),
+            "token_usage": {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens} if usage else None,
+        }
+        existed = os.path.exists(path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp_path, path)
+        if not existed:
+            with self._lock:
+                self._entries += 1
+        if self.max_entries is not None and self._entries > self.max_entries:
+            self._evict()
+
+    @staticmethod
+    def _mtime(path):
+        """Last-used time of `path`, or 0 if it was removed while listing (sorts first, removal is a no-op)."""
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return 0.0
+
+    def _evict(self):
+        """Drop least-recently-used entries down to 90% of `max_entries`."""
+        with self._lock:
+            paths = sorted(self._paths(), key=self._mtime)
+            excess = len(paths) - int(self.max_entries * 0.9)
+            for path in paths[:max(excess, 0)]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._entries = len(paths) - max(excess, 0)
+
+    # -----------------------------
+    # Model interface
+    # -----------------------------
+    def _key(self, messages, stop_sequences, response_format, tools_to_call_from, kwargs):
+        return cache_key(
+            self.model_id,
+            messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools=[tool.name for tool in tools_to_call_from or []],
+            kwargs=kwargs,
+            model_kwargs=getattr(self.model, "kwargs", {}),
+        )
+
+    def _lookup(self, key):
+        """Return a cached ChatMessage for `key`, or None if the model must be called."""
+        if self.mode == "record":
+            return None
+        entry = self._load(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            if self.mode == "replay":
+                raise CacheMiss(f"No recorded LLM response for request {key}")
+            return None
+        with self._lock:
+            self.hits += 1
+        # Cached answers cost nothing, so they report zero tokens.
+        return ChatMessage.from_dict(dict(entry["response"]), token_usage=TokenUsage(input_tokens=0, output_tokens=0))
+
+    def generate(self, messages, stop_sequences=None, response_format=None, tools_to_call_from=None, **kwargs):
+        if self.mode == "off":
+            return self.model.generate(messages, stop_sequences=stop_sequences, response_format=response_format,
+                                       tools_to_call_from=tools_to_call_from, **kwargs)
+        key = self._key(messages, stop_sequences, response_format, tools_to_call_from, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        message = self.model.generate(messages, stop_sequences=stop_sequences, response_format=response_format,
+                                      tools_to_call_from=tools_to_call_from, **kwargs)
+        self._store(key, message)
+        return message
+
+    def generate_stream(self, messages, stop_sequences=None, response_format=None, tools_to_call_from=None, **kwargs):
+        call_kwargs = dict(stop_sequences=stop_sequences, response_format=response_format,
+                           tools_to_call_from=tools_to_call_from, **kwargs)
+        if self.mode == "off":
+            yield from self.model.generate_stream(messages, **call_kwargs)
+            return
+        key = self._key(messages, stop_sequences, response_format, tools_to_call_from, kwargs)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield ChatMessageStreamDelta(content=cached.content, token_usage=cached.token_usage)
+            return
+        deltas = []
+        for delta in self.model.generate_stream(messages, **call_kwargs):
+            deltas.append(delta)
+            yield delta
+        self._store(key, agglomerate_stream_deltas(deltas))
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set on the wrapper (e.g. api_base).
+        model = self.__dict__.get("model")
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
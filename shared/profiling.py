@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Opt-in CPU and memory profiling for agent runs.
+
+Set NUTRITION_PROFILE_DIR to a directory to profile every `agent.run`: the run
+is wrapped in cProfile and tracemalloc, and each tool `forward` is timed and
+its memory growth measured. Each run writes a folder of artifacts:
+
+    <dir>/<run id>/profile.prof       cProfile stats (open with pstats or snakeviz)
+    <dir>/<run id>/allocations.json   top allocation sites by net bytes during the run
+    <dir>/<run id>/summary.json       task, duration, peak memory, per-tool calls/time/memory
+
+smolagents runs the generated code, and so the tools, on a worker thread that
+the run's cProfile cannot see, so each tool call is also profiled on its own
+thread and merged into the run's profile.prof.
+NUTRITION_PROFILE_MEMORY=0 skips tracemalloc, which is the expensive part.
+When NUTRITION_PROFILE_DIR is unset nothing is wrapped, so there is no overhead.
+
+Aggregate the runs in a directory with:
+
+    python shared/profiling.py report <dir> [--top 20]
+"""
+import argparse
+import cProfile
+import glob
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from itertools import count
+
+_run_ids = count(1)
+
+# tracemalloc is process-wide; it runs while any profiled run needs it. If
+# something else (e.g. python -X tracemalloc) was already tracing, leave it on.
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_started_tracing = False
+
+
+def _start_tracing():
+    global _tracing_runs, _started_tracing
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_runs += 1
+
+
+def _stop_tracing():
+    global _tracing_runs, _started_tracing
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class RunProfile:
+    """Artifacts for one profiled call; written by `save`."""
+
+    def __init__(self, out_dir, label, memory=True, top=25):
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_run_ids)}"
+        self.path = os.path.join(out_dir, self.run_id)
+        self.label = label
+        self.memory = memory
+        self.top = top
+        self.tools = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "memory_bytes": 0})
+        self.profiler = cProfile.Profile()
+        self.tool_profiles = []  # per-call profilers of tools run on other threads
+
+    def __enter__(self):
+        if self.memory:
+            _start_tracing()
+            tracemalloc.reset_peak()
+            self._before = tracemalloc.take_snapshot()
+        self._start = time.perf_counter()
+        self.thread = threading.get_ident()
+        try:
+            self.profiler.enable()
+            self.cpu = True
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; a concurrent run holds it.
+            self.cpu = False
+        return self
+
+    def __exit__(self, *exc):
+        if self.cpu:
+            self.profiler.disable()
+        self.seconds = time.perf_counter() - self._start
+        self.allocations = []
+        self.peak_bytes = None
+        if self.memory:
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            after = tracemalloc.take_snapshot()
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            diff = after.filter_traces(filters).compare_to(self._before.filter_traces(filters), "lineno")
+            self.allocations = [
+                {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 "size_bytes": stat.size_diff, "count": stat.count_diff}
+                for stat in [stat for stat in diff if stat.size_diff > 0][:self.top]
+            ]
+            self._before = None
+            _stop_tracing()
+        return False
+
+    def save(self, error=None):
+        os.makedirs(self.path, exist_ok=True)
+        profiles = ([self.profiler] if self.cpu else []) + self.tool_profiles
+        if profiles:
+            stats = pstats.Stats(profiles[0], stream=io.StringIO())
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(os.path.join(self.path, "profile.prof"))
+        with open(os.path.join(self.path, "allocations.json"), "w") as f:
+            json.dump(self.allocations, f, indent=2)
+        with open(os.path.join(self.path, "summary.json"), "w") as f:
+            json.dump({
+                "run_id": self.run_id,
+                "label": self.label,
+                "seconds": self.seconds,
+                "peak_memory_bytes": self.peak_bytes,
+                "error": error,
+                "tools": dict(self.tools),
+            }, f, indent=2)
+
+
+class Profiler:
+    """Wraps an agent's `run` and its tools' `forward` so each run is profiled into `out_dir`."""
+
+    def __init__(self, out_dir, memory=True, top=25):
+        self.out_dir = out_dir
+        self.memory = memory
+        self.top = top
+        self.runs = []
+        # The run in progress. Not thread-local: smolagents executes the agent's code,
+        # and so its tool calls, on a separate thread.
+        self.current = None
+
+    @classmethod
+    def from_env(cls):
+        """A Profiler configured by NUTRITION_PROFILE_DIR / NUTRITION_PROFILE_MEMORY, or None if disabled."""
+        out_dir = os.getenv("NUTRITION_PROFILE_DIR")
+        if not out_dir:
+            return None
+        memory = os.getenv("NUTRITION_PROFILE_MEMORY", "1").strip().lower() not in ["0", "false", "no"]
+        return cls(out_dir, memory=memory)
+
+    def _profiled(self, label, fn, *args, **kwargs):
+        profile = RunProfile(self.out_dir, label, memory=self.memory, top=self.top)
+        self.current = profile
+        error = None
+        try:
+            with profile:
+                return fn(*args, **kwargs)
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.current = None
+            profile.save(error)
+            self.runs.append(profile.path)
+
+    def wrap_agent(self, agent):
+        """Profile every `agent.run` and time every tool call; returns `agent`."""
+        run = agent.run
+
+        def profiled_run(task, *args, **kwargs):
+            if kwargs.get("stream"):
+                return run(task, *args, **kwargs)  # generators are consumed outside the profiler
+            return self._profiled(f"agent.run: {str(task)[:200]}", run, task, *args, **kwargs)
+
+        agent.run = profiled_run
+        for tool in agent.tools.values():
+            if tool.name != "final_answer":
+                self.wrap_tool(tool)
+        return agent
+
+    def wrap_tool(self, tool):
+        """
+        Time and profile `tool.forward`. Inside a profiled run the call is attributed
+        to that run; on its own the call gets its own profile.
+        """
+        forward = tool.forward
+
+        def profiled_forward(*args, **kwargs):
+            current = self.current
+            if current is None:
+                return self._profiled(f"tool: {tool.name}", forward, *args, **kwargs)
+            memory_before = tracemalloc.get_traced_memory()[0] if current.memory else 0
+            profiler = None
+            if threading.get_ident() != current.thread:  # the run's profiler cannot see this thread
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:
+                    profiler = None  # Python 3.12+: one profiler per process, and the run's already sees all threads
+            start = time.perf_counter()
+            try:
+                return forward(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                    current.tool_profiles.append(profiler)
+                stats = current.tools[tool.name]
+                stats["calls"] += 1
+                stats["seconds"] += time.perf_counter() - start
+                if current.memory:
+                    stats["memory_bytes"] += tracemalloc.get_traced_memory()[0] - memory_before
+
+        tool.forward = profiled_forward
+        return tool
+
+
+def profile_from_env(agent):
+    """Wrap `agent` for profiling if NUTRITION_PROFILE_DIR is set; otherwise return it untouched."""
+    profiler = Profiler.from_env()
+    return profiler.wrap_agent(agent) if profiler else agent
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def aggregate(profile_dir, top=20) -> dict:
+    """Combine every run under `profile_dir` into top functions, allocation sites and tool totals."""
+    run_dirs = sorted(d for d in glob.glob(os.path.join(profile_dir, "*")) if os.path.isfile(os.path.join(d, "summary.json")))
+    stats = None
+    allocations = defaultdict(lambda: {"size_bytes": 0, "count": 0, "runs": 0})
+    tools = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "memory_bytes": 0})
+    seconds = []
+    for run_dir in run_dirs:
+        prof = os.path.join(run_dir, "profile.prof")
+        if os.path.exists(prof):
+            if stats is None:
+                stats = pstats.Stats(prof, stream=io.StringIO())
+            else:
+                stats.add(prof)
+        with open(os.path.join(run_dir, "allocations.json")) as f:
+            for a in json.load(f):
+                site = allocations[a["site"]]
+                site["size_bytes"] += a["size_bytes"]
+                site["count"] += a["count"]
+                site["runs"] += 1
+        with open(os.path.join(run_dir, "summary.json")) as f:
+            summary = json.load(f)
+        seconds.append(summary["seconds"])
+        for name, t in summary["tools"].items():
+            for k, v in t.items():
+                tools[name][k] += v
+
+    functions = []
+    if stats is not None:
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        for (filename, line, name), (cc, nc, tt, ct, _) in rows[:top]:
+            functions.append({"function": f"{filename}:{line}({name})", "calls": nc,
+                              "self_seconds": tt, "cumulative_seconds": ct})
+    return {
+        "runs": len(run_dirs),
+        "total_seconds": sum(seconds),
+        "functions": functions,
+        "allocations": sorted(({"site": s, **v} for s, v in allocations.items()),
+                              key=lambda a: a["size_bytes"], reverse=True)[:top],
+        "tools": dict(sorted(tools.items(), key=lambda item: item[1]["seconds"], reverse=True)),
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['runs']} profiled run(s), {report['total_seconds']:.2f}s total", "",
+             "Top functions by cumulative time:",
+             f"{'cumulative s':>12} {'self s':>9} {'calls':>8}  function"]
+    for f in report["functions"]:
+        lines.append(f"{f['cumulative_seconds']:>12.3f} {f['self_seconds']:>9.3f} {f['calls']:>8}  {f['function']}")
+    lines += ["", "Top allocation sites (net bytes during runs):", f"{'KiB':>10} {'blocks':>8} {'runs':>5}  site"]
+    for a in report["allocations"]:
+        lines.append(f"{a['size_bytes'] / 1024:>10.1f} {a['count']:>8} {a['runs']:>5}  {a['site']}")
+    lines += ["", "Tools:", f"{'seconds':>9} {'calls':>6} {'KiB':>10}  tool"]
+    for name, t in report["tools"].items():
+        lines.append(f"{t['seconds']:>9.3f} {t['calls']:>6} {t['memory_bytes'] / 1024:>10.1f}  {name}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_cmd = commands.add_parser("report", help="Aggregate the profiled runs in a directory.")
+    report_cmd.add_argument("profile_dir", nargs="?", default=os.getenv("NUTRITION_PROFILE_DIR"))
+    report_cmd.add_argument("--top", type=int, default=20)
+    report_cmd.add_argument("--json", action="store_true", help="Print the aggregate as JSON.")
+    args = parser.parse_args(argv)
+
+    if not args.profile_dir:
+        parser.error("profile_dir is required (or set NUTRITION_PROFILE_DIR).")
+    report = aggregate(args.profile_dir, args.top)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()